@@ -3,12 +3,498 @@ from tkinter import scrolledtext
 import subprocess
 import threading
 from tkinter import filedialog
+from tkinter import font as tkfont
 import os
+import sys
 import json
 import re
 import time
 import zipfile
 import shutil
+import tarfile
+import gzip
+import hashlib
+import io
+import collections
+import concurrent.futures
+import queue
+import shlex
+import socket
+import atexit
+import asyncio
+import sqlite3
+import calendar
+import array
+import tempfile
+
+try:
+    import psycopg2
+    import psycopg2.pool
+except ImportError:  # Sin psycopg2 se usa psql dentro del contenedor
+    psycopg2 = None
+
+
+# Conexión a PostgreSQL (contenedor ldb dentro de la máquina virtual)
+LDB_CONTAINER = "ldb"
+LDB_USER = os.getenv("LDB_USER", "odoo")
+LDB_PASSWORD = os.getenv("LDB_PASSWORD", "odoo")
+LDB_LOCAL_PORT = int(os.getenv("LDB_LOCAL_PORT", "15432"))
+
+_ldb_tunnel = None
+_ldb_pool = None
+_ldb_lock = threading.Lock()
+
+
+def quote_ident(name):
+    # Escapar un identificador SQL (nombre de base de datos)
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _get_ldb_address():
+    # IP del contenedor ldb dentro de la red de docker de la VM
+    process = subprocess.run(
+        [
+            "vagrant",
+            "ssh",
+            "-c",
+            f"docker inspect -f '{{{{range .NetworkSettings.Networks}}}}"
+            f"{{{{.IPAddress}}}} {{{{end}}}}' {LDB_CONTAINER}",
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        timeout=60,
+    )
+    addresses = process.stdout.split()
+    if process.returncode != 0 or not addresses:
+        raise Exception(f"No se pudo obtener la IP del contenedor {LDB_CONTAINER}")
+    return addresses[0]
+
+
+def _port_is_open(port, timeout=0.5):
+    try:
+        with socket.create_connection(("127.0.0.1", port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+def _ensure_ldb_tunnel():
+    # Mantener un único túnel SSH (vagrant ssh -L) hacia el puerto 5432 de ldb;
+    # devuelve True si ha tenido que abrir uno nuevo
+    global _ldb_tunnel
+
+    if _ldb_tunnel is not None and _ldb_tunnel.poll() is None:
+        return False
+    if _port_is_open(LDB_LOCAL_PORT):
+        # Túnel creado por otra instancia o por el usuario
+        return False
+
+    ldb_ip = _get_ldb_address()
+    _ldb_tunnel = subprocess.Popen(
+        [
+            "vagrant",
+            "ssh",
+            "--",
+            "-N",
+            "-o",
+            "ExitOnForwardFailure=yes",
+            "-L",
+            f"{LDB_LOCAL_PORT}:{ldb_ip}:5432",
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if _port_is_open(LDB_LOCAL_PORT):
+            return True
+        if _ldb_tunnel.poll() is not None:
+            break
+        time.sleep(0.2)
+    raise Exception(f"No se pudo abrir el túnel al puerto {LDB_LOCAL_PORT}")
+
+
+def _reset_ldb_pool():
+    # Llamar con _ldb_lock tomado
+    global _ldb_pool
+
+    if _ldb_pool is not None and not _ldb_pool.closed:
+        _ldb_pool.closeall()
+    _ldb_pool = None
+
+
+def _get_ldb_pool():
+    global _ldb_pool
+
+    with _ldb_lock:
+        if _ensure_ldb_tunnel():
+            # Túnel nuevo (VM parada, reanudada o restaurada): las conexiones
+            # del pool iban por el anterior y ya no sirven
+            _reset_ldb_pool()
+        if _ldb_pool is None or _ldb_pool.closed:
+            _ldb_pool = psycopg2.pool.ThreadedConnectionPool(
+                1,
+                8,
+                host="127.0.0.1",
+                port=LDB_LOCAL_PORT,
+                user=LDB_USER,
+                password=LDB_PASSWORD,
+                dbname="postgres",
+                connect_timeout=5,
+                application_name="lgd-helper",
+            )
+        return _ldb_pool
+
+
+def _run_sql_psql(sql, dbname):
+    # Alternativa sin psycopg2: psql dentro del contenedor, salida sin formato
+    command = (
+        f"docker exec -i {LDB_CONTAINER} psql -U {shlex.quote(LDB_USER)} "
+        f"-d {shlex.quote(dbname)} -X -q -A -t -z -v ON_ERROR_STOP=1"
+    )
+    process = subprocess.run(
+        ["vagrant", "ssh", "--no-tty", "-c", command],
+        input=sql,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    if process.returncode != 0:
+        raise Exception(process.stderr.strip() or "Error al ejecutar psql")
+    return [line.split("\0") for line in process.stdout.splitlines() if line]
+
+
+def _execute(conn, sql, params, autocommit):
+    # CREATE/DROP DATABASE no pueden ejecutarse dentro de una transacción
+    conn.autocommit = autocommit
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall() if cursor.description else []
+        if not autocommit:
+            conn.commit()
+        return [list(row) for row in rows]
+    except psycopg2.Error:
+        if not autocommit and not conn.closed:
+            conn.rollback()
+        raise
+
+
+def run_sql(sql, params=None, dbname="postgres", autocommit=False):
+    # Ejecutar SQL en ldb y devolver las filas como listas de valores
+    if psycopg2 is None:
+        if params:
+            sql = sql % tuple("'" + str(p).replace("'", "''") + "'" for p in params)
+        return _run_sql_psql(sql, dbname)
+
+    pool = _get_ldb_pool()
+    if dbname != "postgres":
+        # Conexión puntual a otra base de datos a través del mismo túnel
+        conn = psycopg2.connect(
+            host="127.0.0.1",
+            port=LDB_LOCAL_PORT,
+            user=LDB_USER,
+            password=LDB_PASSWORD,
+            dbname=dbname,
+            connect_timeout=5,
+        )
+        try:
+            return _execute(conn, sql, params, autocommit)
+        finally:
+            conn.close()
+
+    for attempt in range(2):
+        conn = pool.getconn()
+        try:
+            return _execute(conn, sql, params, autocommit)
+        except psycopg2.OperationalError:
+            # Conexión del pool caída (ldb reiniciado, túnel recreado por otra
+            # instancia): un reintento con un pool nuevo
+            if attempt or not conn.closed:
+                raise
+            with _ldb_lock:
+                if _ldb_pool is pool:
+                    _reset_ldb_pool()
+        finally:
+            if not pool.closed:
+                pool.putconn(conn, close=bool(conn.closed))
+        pool = _get_ldb_pool()
+
+
+def close_ldb_connections():
+    global _ldb_tunnel
+
+    _reset_ldb_pool()
+    if _ldb_tunnel is not None and _ldb_tunnel.poll() is None:
+        _ldb_tunnel.terminate()
+    _ldb_tunnel = None
+
+
+atexit.register(close_ldb_connections)
+
+
+def list_databases():
+    rows = run_sql(
+        "SELECT d.datname, pg_database_size(d.datname), "
+        "pg_size_pretty(pg_database_size(d.datname)), d.datistemplate, "
+        "(SELECT count(*) FROM pg_stat_activity a WHERE a.datname = d.datname) "
+        "FROM pg_database d WHERE d.datallowconn ORDER BY d.datname"
+    )
+    databases = []
+    for name, size, size_pretty, is_template, connections in rows:
+        databases.append(
+            {
+                "name": name,
+                "size": int(size),
+                "size_pretty": size_pretty,
+                "is_template": is_template in (True, "t"),
+                "connections": int(connections),
+            }
+        )
+    return databases
+
+
+def terminate_connections(db_name):
+    run_sql(
+        "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+        "WHERE datname = %s AND pid <> pg_backend_pid()",
+        (db_name,),
+    )
+
+
+def drop_database(db_name):
+    terminate_connections(db_name)
+    run_sql(f"DROP DATABASE IF EXISTS {quote_ident(db_name)}", autocommit=True)
+
+
+# Postgres trunca sin avisar los identificadores de más de 63 bytes
+PG_NAME_LIMIT = 63
+
+
+def db_name_fits(db_name):
+    return len(db_name.encode("utf-8")) <= PG_NAME_LIMIT
+
+
+def create_database(db_name, template=None):
+    if not db_name_fits(db_name):
+        raise Exception(
+            f"El nombre '{db_name}' supera los {PG_NAME_LIMIT} bytes de PostgreSQL"
+        )
+    sql = f"CREATE DATABASE {quote_ident(db_name)} OWNER {quote_ident(LDB_USER)}"
+    if template:
+        # La plantilla no puede tener conexiones abiertas durante la copia
+        terminate_connections(template)
+        sql += f" TEMPLATE {quote_ident(template)}"
+    run_sql(sql, autocommit=True)
+
+
+# Núcleo asyncio: el bucle corre en su propio hilo y Tk sigue con
+# root.mainloop() en el hilo principal, que es el que atiende las llamadas a
+# Tk hechas desde otros hilos (bucle asyncio o trabajos)
+STREAM_LINE_LIMIT = 1024 * 1024
+VAGRANT_TIMEOUT = 30 * 60
+
+loop = None
+_output_task = None
+_probe_task = None
+_probe_generation = 0
+
+
+def run_async(coro):
+    # Programar una corrutina desde Tk o desde un hilo de trabajo
+    return asyncio.run_coroutine_threadsafe(coro, loop)
+
+
+def start_output_task(coro):
+    # Solo un stream escribe en output_box: el anterior (p. ej. logs -f) se cancela
+    global _output_task
+
+    if _output_task is not None and not _output_task.done():
+        _output_task.cancel()
+    _output_task = run_async(coro)
+    return _output_task
+
+
+def start_probe_task(coro):
+    # El sondeo de puertos vive mientras se vea el listado de contenedores
+    global _probe_task
+
+    stop_probe_task()
+    _probe_task = run_async(coro)
+    return _probe_task
+
+
+def stop_probe_task():
+    # La generación corta también un sondeo que ya esté escribiendo resultados
+    # antes de que la cancelación llegue al bucle asyncio
+    global _probe_generation
+
+    _probe_generation += 1
+    if _probe_task is not None and not _probe_task.done():
+        _probe_task.cancel()
+
+
+def append_output(output_box, text):
+    output_box.insert(tk.END, text)
+    output_box.see(tk.END)
+
+
+async def stream_command(args, on_line, timeout=None):
+    # Ejecutar un comando y pasar cada línea a on_line; mata el proceso al
+    # cancelar la tarea o al agotar el timeout
+    process = await asyncio.create_subprocess_exec(
+        *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+        limit=STREAM_LINE_LIMIT,
+    )
+
+    async def pump():
+        async for raw in process.stdout:
+            on_line(raw.decode(errors="replace"))
+        return await process.wait()
+
+    try:
+        return await asyncio.wait_for(pump(), timeout)
+    except (asyncio.CancelledError, asyncio.TimeoutError):
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        raise
+
+
+async def run_command(args, timeout=None):
+    lines = []
+    code = await stream_command(args, lines.append, timeout)
+    return code, "".join(lines)
+
+
+def start_async_loop():
+    global loop
+
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+
+
+def stop_async_loop():
+    # Cancelar las tareas pendientes (mata sus procesos) y parar el bucle
+    async def cancel_tasks():
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    try:
+        run_async(cancel_tasks()).result(timeout=10)
+    except concurrent.futures.TimeoutError:
+        pass
+    loop.call_soon_threadsafe(loop.stop)
+
+
+# Planificador de operaciones: bloqueos por proyecto y límite de trabajos pesados
+HEAVY_JOB_LIMIT = int(os.getenv("LGD_HEAVY_JOBS", "2"))
+FINISHED_JOBS_SHOWN = 5
+
+
+class Job:
+    def __init__(self, name, locks, func, heavy):
+        self.name = name
+        self.locks = set(locks)
+        self.func = func
+        self.heavy = heavy
+        self.state = "waiting"
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+
+
+class JobScheduler:
+    # Los trabajos con bloqueos en común se encolan en orden de llegada; los
+    # de proyectos distintos se ejecutan en paralelo en hilos propios
+    def __init__(self, heavy_limit=HEAVY_JOB_LIMIT):
+        self.heavy_limit = heavy_limit
+        self.jobs = []
+        self.held_locks = set()
+        self.running_heavy = 0
+        self.lock = threading.Lock()
+        self.listeners = []
+
+    def submit(self, name, locks, func, heavy=False):
+        job = Job(name, locks, func, heavy)
+        with self.lock:
+            self.jobs.append(job)
+            self._dispatch()
+            queued = job.state == "waiting"
+        self._notify()
+        return job, queued
+
+    def _dispatch(self):
+        # Llamar con self.lock tomado. Un trabajo en espera reserva sus
+        # bloqueos para que los posteriores no se le adelanten
+        reserved = set()
+        heavy_slots = self.heavy_limit - self.running_heavy
+        for job in self.jobs:
+            if job.state != "waiting":
+                continue
+            conflicts = job.locks & (self.held_locks | reserved)
+            if conflicts or (job.heavy and heavy_slots <= 0):
+                reserved |= job.locks
+                continue
+            job.state = "running"
+            job.started = time.time()
+            self.held_locks |= job.locks
+            if job.heavy:
+                self.running_heavy += 1
+                heavy_slots -= 1
+            threading.Thread(target=self._run, args=(job,), daemon=True).start()
+
+    def _run(self, job):
+        try:
+            job.func()
+            job.state = "done"
+        except Exception:
+            job.state = "failed"
+        job.finished = time.time()
+        with self.lock:
+            self.held_locks -= job.locks
+            if job.heavy:
+                self.running_heavy -= 1
+            # Conservar solo los últimos trabajos terminados para el panel
+            finished = [j for j in self.jobs if j.finished is not None]
+            for old in finished[:-FINISHED_JOBS_SHOWN]:
+                self.jobs.remove(old)
+            self._dispatch()
+        self._notify()
+
+    def snapshot(self):
+        with self.lock:
+            return list(self.jobs)
+
+    def has_active_jobs(self):
+        with self.lock:
+            return any(job.state in ("waiting", "running") for job in self.jobs)
+
+    def _notify(self):
+        for listener in self.listeners:
+            listener()
+
+
+scheduler = JobScheduler()
+
+
+def submit_job(name, locks, func, output_box, heavy=False):
+    # La salida del trabajo sustituye al listado de contenedores
+    stop_probe_task()
+    job, queued = scheduler.submit(name, locks, func, heavy)
+    if queued:
+        output_box.insert(tk.END, f"⏳ '{name}' en cola (operación en conflicto)\n")
+    return job
+
+
+def project_lock(db_name):
+    return f"db:{db_name}"
 
 
 def create_vscode_config(repo_path, output_box):
@@ -58,6 +544,32 @@ def create_vscode_config(repo_path, output_box):
                     "group": "test",
                     "problemMatcher": [],
                 },
+                {
+                    "label": "⏱️ Iniciar y esperar Odoo",
+                    "type": "shell",
+                    "command": f"cd ../../;python3 gui.py start-container {container_name}",
+                    "presentation": {
+                        "reveal": "always",
+                        "panel": "dedicated",
+                        "focus": True,
+                        "clear": True,
+                    },
+                    "group": "test",
+                    "problemMatcher": [],
+                },
+                {
+                    "label": "⏱️ Reiniciar y esperar Odoo",
+                    "type": "shell",
+                    "command": f"cd ../../;python3 gui.py start-container {container_name} --restart",
+                    "presentation": {
+                        "reveal": "always",
+                        "panel": "dedicated",
+                        "focus": True,
+                        "clear": True,
+                    },
+                    "group": "test",
+                    "problemMatcher": [],
+                },
                 {
                     "label": "⏹️ Detener Contenedor Odoo",
                     "type": "shell",
@@ -88,16 +600,13 @@ def create_vscode_config(repo_path, output_box):
         return False
 
 
-def create_folder_selector():
+def create_folder_selector(on_select_folder):
     # Crear una nueva ventana
     selector = tk.Toplevel(root)
     selector.title("Seleccionar Repositorio")
     selector.geometry("400x300")
     selector.configure(bg="#1e1e1e")
 
-    # Variable para almacenar la selección
-    selected_folder = tk.StringVar()
-
     # Obtener la lista de carpetas en dev
     default_path = os.path.join(os.getcwd(), "dev")
     if not os.path.exists(default_path):
@@ -123,8 +632,8 @@ def create_folder_selector():
         if listbox.curselection():
             selected = listbox.get(listbox.curselection())
             repo_path = os.path.join(default_path, selected)
-            selected_folder.set(repo_path)
             selector.destroy()
+            on_select_folder(repo_path)
 
     # Botón de selección
     select_btn = tk.Button(
@@ -137,14 +646,12 @@ def create_folder_selector():
     )
     select_btn.pack(pady=10)
 
-    # Esperar a que se cierre la ventana
-    selector.wait_window()
-    return selected_folder.get()
-
 
 def select_repository():
-    repo_path = create_folder_selector()
+    create_folder_selector(open_repository)
 
+
+def open_repository(repo_path):
     if repo_path:
         output_box.insert(tk.END, f"📂 Repositorio seleccionado: {repo_path}\n")
         # Crear configuración de VS Code
@@ -164,16 +671,55 @@ def select_repository():
             )
 
 
-def check_vagrant_status():
+# Modos de arranque de la VM (guardados por desarrollador en config.json)
+VM_START_MODES = {
+    "full": "Arranque completo (up/halt)",
+    "resume": "Suspender y reanudar",
+    "snapshot": "Snapshot en caliente",
+}
+WARM_SNAPSHOT = "lgd-warm"
+VM_START_STATS_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "lgd-helper", "vm-start-times.json"
+)
+
+
+def current_user_dev():
+    return os.getenv("USERDEV", "controlcdms-gh")
+
+
+def get_vm_start_mode():
+    mode = load_config().get("vmStartMode", {}).get(current_user_dev(), "full")
+    return mode if mode in VM_START_MODES else "full"
+
+
+def set_vm_start_mode(mode):
+    config = load_config()
+    config.setdefault("vmStartMode", {})[current_user_dev()] = mode
+    save_config(config)
+
+
+def load_vm_start_stats():
+    try:
+        with open(VM_START_STATS_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def record_vm_start_time(mode, seconds):
+    stats = load_vm_start_stats()
+    runs = stats.setdefault(mode, [])
+    runs.append({"date": time.strftime("%Y-%m-%d %H:%M"), "seconds": round(seconds)})
+    del runs[:-20]
+    os.makedirs(os.path.dirname(VM_START_STATS_PATH), exist_ok=True)
+    with open(VM_START_STATS_PATH, "w") as f:
+        json.dump(stats, f, indent=2)
+
+
+async def check_vagrant_status():
     try:
         # Intentar obtener el estado de vagrant
-        process = subprocess.Popen(
-            ["vagrant", "status"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-        )
-        output = process.communicate()[0]
+        code, output = await run_command(["vagrant", "status"], timeout=60)
 
         # Si encuentra "running" en la salida, la máquina está encendida
         is_running = "running" in output.lower()
@@ -182,8 +728,8 @@ def check_vagrant_status():
         return False
 
 
-def update_start_button_state():
-    is_running = check_vagrant_status()
+async def update_start_button_state():
+    is_running = await check_vagrant_status()
     if is_running:
         start_btn.config(text="✨ Entorno LGD Activo", state="disabled", fg="#888888")
         halt_btn.config(state="normal", fg="#00FF00")
@@ -195,187 +741,1246 @@ def update_start_button_state():
 
 
 def run_vagrant_up(output_box):
-    if check_vagrant_status():
-        output_box.insert(tk.END, "⚠️ La máquina virtual ya está encendida\n")
-        return
+    async def task():
+        if await check_vagrant_status():
+            output_box.insert(tk.END, "⚠️ La máquina virtual ya está encendida\n")
+            return
+
+        mode = get_vm_start_mode()
+        on_line = lambda line: append_output(output_box, line)
+        start = time.monotonic()
+        output_box.begin_section()
+
+        code = None
+        if mode == "resume":
+            output_box.insert(tk.END, "🔧 Ejecutando 'vagrant resume'...\n\n")
+            code = await stream_command(
+                ["vagrant", "resume"], on_line, timeout=VAGRANT_TIMEOUT
+            )
+        elif mode == "snapshot":
+            output_box.insert(
+                tk.END, f"🔧 Restaurando snapshot '{WARM_SNAPSHOT}'...\n\n"
+            )
+            code = await stream_command(
+                ["vagrant", "snapshot", "restore", "--no-provision", WARM_SNAPSHOT],
+                on_line,
+                timeout=VAGRANT_TIMEOUT,
+            )
 
-    output_box.delete(1.0, tk.END)
-    output_box.insert(tk.END, "🔧 Ejecutando 'vagrant up'...\n\n")
+        used_mode = mode
+        if mode == "full" or code != 0 or not await check_vagrant_status():
+            if mode != "full":
+                output_box.insert(
+                    tk.END, "\n⚠️ Arranque rápido fallido, usando 'vagrant up'\n\n"
+                )
+            else:
+                output_box.insert(tk.END, "🔧 Ejecutando 'vagrant up'...\n\n")
+            used_mode = "full"
+            await stream_command(["vagrant", "up"], on_line, timeout=VAGRANT_TIMEOUT)
 
-    def task():
-        process = subprocess.Popen(
-            ["vagrant", "up"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-        )
-        for line in process.stdout:
-            output_box.insert(tk.END, line)
-            output_box.see(tk.END)
+        elapsed = time.monotonic() - start
+        record_vm_start_time(used_mode, elapsed)
         output_box.insert(tk.END, "\n✅ Entorno iniciado.\n")
+        output_box.insert(
+            tk.END,
+            f"⏱️ Máquina lista en {elapsed:.0f} s ({VM_START_MODES[used_mode]})\n",
+        )
         # Actualizar estado del botón después de iniciar
-        root.after(0, update_start_button_state)
+        await update_start_button_state()
 
-    threading.Thread(target=task).start()
+    start_output_task(task())
 
 
 def run_vagrant_halt(output_box):
-    output_box.delete(1.0, tk.END)
-    output_box.insert(tk.END, "🛑 Deteniendo la máquina virtual...\n\n")
+    mode = get_vm_start_mode()
+    command = ["vagrant", "suspend"] if mode == "resume" else ["vagrant", "halt"]
+
+    output_box.begin_section()
+    output_box.insert(
+        tk.END,
+        (
+            "💤 Suspendiendo la máquina virtual...\n\n"
+            if mode == "resume"
+            else "🛑 Deteniendo la máquina virtual...\n\n"
+        ),
+    )
 
-    def task():
-        process = subprocess.Popen(
-            ["vagrant", "halt"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
+    async def task():
+        await stream_command(
+            command,
+            lambda line: append_output(output_box, line),
+            timeout=VAGRANT_TIMEOUT,
         )
-        for line in process.stdout:
-            output_box.insert(tk.END, line)
-            output_box.see(tk.END)
         output_box.insert(tk.END, "\n✅ Máquina virtual detenida.\n")
         # Actualizar estado del botón después de detener
-        root.after(0, update_start_button_state)
+        await update_start_button_state()
 
-    threading.Thread(target=task).start()
+    start_output_task(task())
 
 
-def show_container_logs(output_box):
-    output_box.delete(1.0, tk.END)
-    output_box.insert(tk.END, "📋 Obteniendo logs del contenedor...\n\n")
+def configure_vm_start_mode(output_box):
+    selector = tk.Toplevel(root)
+    selector.title("Modo de arranque de la VM")
+    selector.geometry("500x440")
+    selector.configure(bg="#1e1e1e")
 
-    def task():
-        process = subprocess.Popen(
-            ["vagrant", "ssh", "-c", "docker logs -f lgdoo --tail 300"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
+    stats = load_vm_start_stats()
+    mode = tk.StringVar(value=get_vm_start_mode())
+
+    # El snapshot se restaura en cada arranque: todo lo creado en la VM desde
+    # que se guardó (bases de datos, restauraciones, checkpoints, filestores)
+    # se pierde, así que el modo sólo se guarda tras confirmarlo
+    snapshot_warning = tk.Frame(selector, bg="#1e1e1e")
+    tk.Label(
+        snapshot_warning,
+        text=(
+            "⚠️ Cada arranque vuelve al snapshot: se pierden las bases de "
+            "datos, restauraciones, checkpoints y filestores creados en la VM "
+            "después de guardarlo."
+        ),
+        wraplength=460,
+        justify=tk.LEFT,
+        font=("Consolas", 11),
+        bg="#1e1e1e",
+        fg="red",
+    ).pack(padx=10, pady=5)
+
+    def on_confirm_snapshot():
+        set_vm_start_mode("snapshot")
+        snapshot_warning.pack_forget()
+
+    tk.Button(
+        snapshot_warning,
+        text="✅ Usar snapshot en caliente",
+        font=("Consolas", 12),
+        bg="#333",
+        fg="#00FF00",
+        command=on_confirm_snapshot,
+    ).pack(pady=5)
+
+    def on_mode_change():
+        if mode.get() == "snapshot":
+            if get_vm_start_mode() != "snapshot":
+                snapshot_warning.pack(fill=tk.X, after=radio_buttons[-1])
+            return
+        snapshot_warning.pack_forget()
+        set_vm_start_mode(mode.get())
+
+    radio_buttons = []
+    for value, label in VM_START_MODES.items():
+        runs = stats.get(value, [])
+        if runs:
+            label += f"  (último: {runs[-1]['seconds']} s)"
+        radio_button = tk.Radiobutton(
+            selector,
+            text=label,
+            value=value,
+            variable=mode,
+            command=on_mode_change,
+            font=("Consolas", 12),
+            bg="#1e1e1e",
+            fg="#00FF00",
+            selectcolor="#333",
+            activebackground="#1e1e1e",
         )
-        for line in process.stdout:
-            output_box.insert(tk.END, line)
-            output_box.see(tk.END)
+        radio_button.pack(anchor="w", padx=10, pady=5)
+        radio_buttons.append(radio_button)
 
-    threading.Thread(target=task).start()
+    def on_save_snapshot():
+        selector.destroy()
+        output_box.begin_section()
+        output_box.insert(
+            tk.END, f"📸 Guardando snapshot en caliente '{WARM_SNAPSHOT}'...\n\n"
+        )
 
+        async def task():
+            if not await check_vagrant_status():
+                output_box.insert(
+                    tk.END, "⚠️ La máquina virtual debe estar encendida\n"
+                )
+                return
+            code = await stream_command(
+                ["vagrant", "snapshot", "save", "--force", WARM_SNAPSHOT],
+                lambda line: append_output(output_box, line),
+                timeout=VAGRANT_TIMEOUT,
+            )
+            if code == 0:
+                output_box.insert(tk.END, "\n✅ Snapshot guardado.\n")
+            else:
+                output_box.insert(tk.END, "\n❌ No se pudo guardar el snapshot.\n")
 
-def list_container_ports(output_box):
-    output_box.delete(1.0, tk.END)
-    output_box.insert(tk.END, "🔍 Contenedores en ejecución:\n\n")
+        start_output_task(task())
 
-    # Configurar el tag para los hipervínculos
-    output_box.tag_config("link", foreground="cyan", underline=1)
+    tk.Button(
+        selector,
+        text="📸 Guardar snapshot en caliente ahora",
+        font=("Consolas", 12),
+        bg="#333",
+        fg="#00FF00",
+        command=on_save_snapshot,
+    ).pack(pady=15)
 
-    def open_url(url):
-        import webbrowser
 
-        webbrowser.open(url)
+# Registro persistente de logs: cada contenedor seguido se guarda en
+# ~/.cache/lgd-helper/container-logs/<contenedor>/ en segmentos .log.gz.
+# Cada bloque de líneas es un miembro gzip independiente (zcat sigue
+# funcionando) y un índice SQLite guarda su posición, rango de tiempo y
+# niveles, así una búsqueda sólo descomprime los bloques de la ventana pedida.
+CONTAINER_LOGS_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "lgd-helper", "container-logs"
+)
+LOG_BLOCK_SIZE = 256 * 1024
+LOG_BLOCK_SECONDS = 5
+LOG_SEGMENT_SIZE = 32 * 1024 * 1024
+LOG_RETENTION_SIZE = int(os.getenv("LGD_LOG_RETENTION_MB", "1024")) * 1024 * 1024
+LOG_SEARCH_LIMIT = 5000
+LOG_LINE_RE = re.compile(
+    r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}),\d+ \d+ "
+    r"(DEBUG|INFO|WARNING|ERROR|CRITICAL) "
+)
+LOG_LEVELS = {"DEBUG": 1, "INFO": 2, "WARNING": 4, "ERROR": 8, "CRITICAL": 16}
 
-    def tag_click(event):
-        # Obtener el índice del click
-        index = output_box.index(f"@{event.x},{event.y}")
-        # Obtener los tags en esa posición
-        tags = output_box.tag_names(index)
-        for tag in tags:
-            if tag.startswith("link_"):
-                url = tag.split("link_")[1]
-                open_url(url)
-                break
 
-    # Bindear el evento de click
-    output_box.tag_bind("link", "<Button-1>", tag_click)
-    output_box.config(cursor="arrow")
+def parse_log_time(text):
+    # Las fechas de Odoo están en UTC
+    return calendar.timegm(time.strptime(text, "%Y-%m-%d %H:%M:%S"))
 
-    def task():
-        vm_ip = "192.168.56.10"
 
-        process = subprocess.Popen(
-            [
-                "vagrant",
-                "ssh",
-                "-c",
-                "docker ps --format '{{.Names}}|{{.Image}}|{{.Ports}}'",
-            ],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-        )
+def parse_log_line(line, previous):
+    # (timestamp, nivel); las líneas sin cabecera (trazas) heredan los de la anterior
+    match = LOG_LINE_RE.match(line)
+    if not match:
+        return previous
+    return parse_log_time(match.group(1)), LOG_LEVELS[match.group(2)]
 
-        for line in process.stdout:
-            if line.strip():
-                parts = line.strip().split("|")
-                container_name = parts[0]
-                image_name = parts[1]
-                ports = parts[2] if len(parts) > 2 else ""
-
-                output_box.insert(tk.END, f"📦 Contenedor: {container_name}\n")
-                output_box.insert(tk.END, f"   🖼️ Imagen: {image_name}\n")
-
-                # Buscar puertos mapeados
-                matches = re.finditer(r"0.0.0.0:(\d+)", ports)
-                ports_found = False
-
-                for match in matches:
-                    ports_found = True
-                    port = match.group(1)
-                    url = f"http://{vm_ip}:{port}"
-
-                    # Insertar el enlace con formato especial
-                    output_box.insert(tk.END, "   🔗 ")
-                    start_index = output_box.index("end-1c")
-                    output_box.insert(tk.END, f"{url}\n")
-                    end_index = output_box.index("end-1c")
-
-                    # Aplicar tags para el hipervínculo
-                    output_box.tag_add(
-                        f"link_http://{vm_ip}:{port}", start_index, end_index
-                    )
-                    output_box.tag_add("link", start_index, end_index)
 
-                if not ports_found:
-                    output_box.insert(tk.END, "   ⚠️ Sin puertos mapeados\n")
+def open_log_index(container):
+    directory = os.path.join(CONTAINER_LOGS_DIR, container)
+    os.makedirs(directory, exist_ok=True)
+    index = sqlite3.connect(os.path.join(directory, "index.db"))
+    index.execute(
+        "CREATE TABLE IF NOT EXISTS blocks (segment TEXT, offset INTEGER, "
+        "length INTEGER, first_ts INTEGER, last_ts INTEGER, levels INTEGER, "
+        "lines INTEGER)"
+    )
+    index.execute(
+        "CREATE INDEX IF NOT EXISTS blocks_time ON blocks (last_ts, first_ts)"
+    )
+    return directory, index
 
-                output_box.insert(tk.END, "\n")
 
-        output_box.insert(tk.END, "\n✅ Listado completado.\n")
-        output_box.see(tk.END)
+def list_saved_log_containers():
+    try:
+        return sorted(
+            name
+            for name in os.listdir(CONTAINER_LOGS_DIR)
+            if os.path.exists(os.path.join(CONTAINER_LOGS_DIR, name, "index.db"))
+        )
+    except OSError:
+        return []
+
+
+class ContainerLogWriter:
+    def __init__(self, container):
+        self.directory, self.index = open_log_index(container)
+        last = self.index.execute(
+            "SELECT segment, (SELECT MAX(last_ts) FROM blocks) FROM blocks "
+            "ORDER BY rowid DESC LIMIT 1"
+        ).fetchone()
+        # Seguir en el último segmento y no repetir las líneas de --tail que
+        # ya se guardaron en un seguimiento anterior
+        self.segment, self.resume_ts = last or (None, 0)
+        self.previous = (None, 0)
+        self.last_write = time.time()
+        self._reset_block()
+
+    def _reset_block(self):
+        self.lines = []
+        self.size = 0
+        self.first_ts = self.last_ts = None
+        self.levels = 0
+        self.block_started = time.time()
+
+    def write(self, line):
+        self.last_write = time.time()
+        header = LOG_LINE_RE.match(line) is not None
+        ts, level = self.previous = parse_log_line(line, self.previous)
+        if ts is None:
+            ts = int(self.last_write)
+        if self.resume_ts:
+            if ts < self.resume_ts:
+                return
+            self.resume_ts = 0
+
+        # Los bloques se cortan antes de una cabecera para no partir trazas
+        full = (
+            self.size >= LOG_BLOCK_SIZE
+            or self.last_write - self.block_started >= LOG_BLOCK_SECONDS
+        )
+        if self.lines and ((header and full) or self.size >= 4 * LOG_BLOCK_SIZE):
+            self.flush()
+
+        if not self.lines:
+            self.first_ts = self.last_ts = ts
+            self.block_started = self.last_write
+        self.first_ts = min(self.first_ts, ts)
+        self.last_ts = max(self.last_ts, ts)
+        self.levels |= level
+        self.lines.append(line if line.endswith("\n") else line + "\n")
+        self.size += len(line)
+
+    def flush_if_idle(self):
+        if self.lines and time.time() - self.last_write >= LOG_BLOCK_SECONDS:
+            self.flush()
+
+    def flush(self):
+        if not self.lines:
+            return
+        data = gzip.compress("".join(self.lines).encode("utf-8", "replace"))
+
+        rotated = False
+        path = self.segment and os.path.join(self.directory, self.segment)
+        if not path or not os.path.exists(path):
+            rotated = self.segment is not None
+            self.segment = None
+        elif os.path.getsize(path) + len(data) > LOG_SEGMENT_SIZE:
+            rotated = True
+            self.segment = None
+        if self.segment is None:
+            stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime(self.first_ts))
+            self.segment = f"{stamp}.log.gz"
+            suffix = 1
+            while os.path.exists(os.path.join(self.directory, self.segment)):
+                suffix += 1
+                self.segment = f"{stamp}-{suffix}.log.gz"
+            path = os.path.join(self.directory, self.segment)
+
+        with open(path, "ab") as f:
+            offset = f.tell()
+            f.write(data)
+        self.index.execute(
+            "INSERT INTO blocks VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                self.segment,
+                offset,
+                len(data),
+                self.first_ts,
+                self.last_ts,
+                self.levels,
+                len(self.lines),
+            ),
+        )
+        self.index.commit()
+        self._reset_block()
+        if rotated:
+            self.prune()
+
+    def prune(self):
+        # Borrar los segmentos más antiguos hasta quedar bajo el límite
+        segments = [
+            row[0]
+            for row in self.index.execute(
+                "SELECT segment FROM blocks GROUP BY segment ORDER BY MIN(rowid)"
+            )
+        ]
+        sizes = {}
+        for segment in segments:
+            try:
+                sizes[segment] = os.path.getsize(os.path.join(self.directory, segment))
+            except OSError:
+                sizes[segment] = 0
+        total = sum(sizes.values())
+        for segment in segments[:-1]:
+            if total <= LOG_RETENTION_SIZE:
+                break
+            try:
+                os.remove(os.path.join(self.directory, segment))
+            except OSError:
+                pass
+            self.index.execute("DELETE FROM blocks WHERE segment = ?", (segment,))
+            total -= sizes[segment]
+        self.index.commit()
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self.index.close()
+
+
+def search_container_logs(
+    container, since, until, min_level=0, text=None, limit=LOG_SEARCH_LIMIT
+):
+    # Devuelve (líneas, bloques leídos, truncado) sin cargar los segmentos enteros
+    mask = sum(value for value in LOG_LEVELS.values() if value >= min_level)
+    if not min_level:
+        mask = 0
+    directory, index = open_log_index(container)
+    try:
+        blocks = index.execute(
+            "SELECT segment, offset, length FROM blocks "
+            "WHERE last_ts >= ? AND first_ts <= ? AND (? = 0 OR levels & ? != 0) "
+            "ORDER BY first_ts, rowid",
+            (since, until, mask, mask),
+        ).fetchall()
+    finally:
+        index.close()
+
+    results = []
+    files = {}
+    try:
+        for read, (segment, offset, length) in enumerate(blocks, 1):
+            try:
+                if segment not in files:
+                    files[segment] = open(os.path.join(directory, segment), "rb")
+                f = files[segment]
+                f.seek(offset)
+                data = gzip.decompress(f.read(length)).decode("utf-8", "replace")
+            except (OSError, EOFError):
+                continue
+            previous = (None, 0)
+            for line in data.splitlines():
+                ts, level = previous = parse_log_line(line, previous)
+                if ts is None or ts < since or ts > until:
+                    continue
+                if mask and not level & mask:
+                    continue
+                if text and text not in line:
+                    continue
+                results.append(line)
+                if len(results) >= limit:
+                    return results, read, True
+    finally:
+        for f in files.values():
+            f.close()
+    return results, len(blocks), False
+
+
+def parse_search_time(text, end=False):
+    text = text.strip()
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            value = calendar.timegm(time.strptime(text, fmt))
+        except ValueError:
+            continue
+        if end and fmt == "%Y-%m-%d":
+            value += 86400 - 1
+        elif end and fmt == "%Y-%m-%d %H:%M":
+            value += 59
+        return value
+    raise ValueError(f"Fecha no válida: {text!r} (usa AAAA-MM-DD HH:MM)")
+
+
+# Visor de logs virtualizado: las últimas LOG_VIEW_LINES líneas en un buffer
+# circular, las anteriores en un archivo temporal, y en Tk sólo las filas
+# visibles; la memoria no crece aunque el seguimiento dure días
+LOG_VIEW_LINES = int(os.getenv("LGD_LOG_VIEW_LINES", "20000"))
+LOG_SPILL_CHECKPOINT = 1024
+
+
+class LogRingBuffer:
+    def __init__(self, capacity=LOG_VIEW_LINES):
+        self.capacity = capacity
+        self.lines = [None] * capacity
+        self.start = 0
+        self.count = 0
+        # Líneas desbordadas a disco, con el desplazamiento de una de cada
+        # LOG_SPILL_CHECKPOINT para poder leerlas sin recorrer todo el archivo
+        self.spill = None
+        self.spilled = 0
+        self.spill_size = 0
+        self.checkpoints = array.array("q")
+        self._reading = False
+        # Se escribe desde el bucle asyncio y se lee al redibujar en Tk
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def __len__(self):
+        return self.spilled + self.count
+
+    def append(self, line):
+        with self.lock:
+            if self.closed:
+                return
+            if self.count < self.capacity:
+                self.lines[(self.start + self.count) % self.capacity] = line
+                self.count += 1
+                return
+            self._spill(self.lines[self.start])
+            self.lines[self.start] = line
+            self.start = (self.start + 1) % self.capacity
+
+    def _spill(self, line):
+        if self.spill is None:
+            self.spill = tempfile.TemporaryFile()
+        if self._reading:
+            self.spill.seek(0, os.SEEK_END)
+            self._reading = False
+        if self.spilled % LOG_SPILL_CHECKPOINT == 0:
+            self.checkpoints.append(self.spill_size)
+        data = line.encode("utf-8", "replace") + b"\n"
+        self.spill.write(data)
+        self.spill_size += len(data)
+        self.spilled += 1
+
+    def _read_spilled(self, first, end):
+        checkpoint = first // LOG_SPILL_CHECKPOINT
+        self.spill.seek(self.checkpoints[checkpoint])
+        self._reading = True
+        for _ in range(checkpoint * LOG_SPILL_CHECKPOINT, first):
+            self.spill.readline()
+        return [
+            self.spill.readline().decode("utf-8", "replace").rstrip("\n")
+            for _ in range(first, end)
+        ]
 
-    threading.Thread(target=task).start()
+    def slice(self, first, size):
+        with self.lock:
+            if self.closed:
+                return []
+            end = min(first + size, len(self))
+            lines = []
+            if first < self.spilled:
+                lines.extend(self._read_spilled(first, min(end, self.spilled)))
+            for i in range(max(first, self.spilled), end):
+                lines.append(
+                    self.lines[(self.start + i - self.spilled) % self.capacity]
+                )
+            return lines
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            if self.spill is not None:
+                self.spill.close()
+                self.spill = None
+
+
+class LogView:
+    def __init__(self, master, text_box):
+        # text_box es la salida normal, a la que se vuelve con hide()
+        self.text_box = text_box
+        self.frame = tk.Frame(master, bg="#000000")
+        self.header = tk.Label(
+            self.frame,
+            font=("Consolas", 10),
+            bg="#1e1e1e",
+            fg="#00FF00",
+            anchor="w",
+        )
+        self.header.pack(fill=tk.X)
+        self.scrollbar = tk.Scrollbar(self.frame, command=self.on_scroll)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.text = tk.Text(
+            self.frame,
+            wrap=tk.NONE,
+            font=("Consolas", 11),
+            bg="#000000",
+            fg="#00FF00",
+            insertbackground="#00FF00",
+        )
+        xscroll = tk.Scrollbar(
+            self.frame, orient=tk.HORIZONTAL, command=self.text.xview
+        )
+        xscroll.pack(side=tk.BOTTOM, fill=tk.X)
+        self.text.configure(xscrollcommand=xscroll.set, state=tk.DISABLED)
+        self.text.pack(expand=True, fill="both")
+        self.text.tag_configure("warning", foreground="#FFD700")
+        self.text.tag_configure("error", foreground="#FF5555")
+
+        self.line_height = tkfont.Font(font=self.text["font"]).metrics("linespace")
+        self.rows = 40
+        self.top = 0
+        self.follow = True
+        self.title = ""
+        self.buffer = LogRingBuffer()
+        self._pending = False
+
+        self.text.bind("<Configure>", self.on_resize)
+        self.text.bind("<MouseWheel>", self.on_wheel)
+        self.text.bind("<Button-4>", lambda event: self.scroll_by(-3))
+        self.text.bind("<Button-5>", lambda event: self.scroll_by(3))
+        self.text.bind("<Prior>", lambda event: self.scroll_by(-self.rows))
+        self.text.bind("<Next>", lambda event: self.scroll_by(self.rows))
+        self.text.bind("<Home>", lambda event: self.scroll_to(0))
+        self.text.bind("<End>", lambda event: self.scroll_to(len(self.buffer)))
+
+    def start(self, title):
+        self.buffer.close()
+        self.buffer = LogRingBuffer()
+        self.top = 0
+        self.follow = True
+        self.title = title
+        self.show()
+        self.redraw()
 
+    def show(self):
+        if not self.frame.winfo_ismapped():
+            self.text_box.pack_forget()
+            self.frame.pack(expand=True, fill="both")
+
+    def hide(self):
+        if self.frame.winfo_ismapped():
+            self.frame.pack_forget()
+            self.text_box.pack(expand=True, fill="both")
+
+    def append(self, line):
+        self.buffer.append(line.rstrip("\r\n"))
+        if not self._pending:
+            # Un solo redibujado por tanda de líneas
+            self._pending = True
+            self.frame.after(50, self.redraw)
+
+    def redraw(self):
+        self._pending = False
+        total = len(self.buffer)
+        last_top = max(0, total - self.rows)
+        self.top = last_top if self.follow else max(0, min(self.top, last_top))
+
+        self.text.configure(state=tk.NORMAL)
+        self.text.delete(1.0, tk.END)
+        for line in self.buffer.slice(self.top, self.rows):
+            match = LOG_LINE_RE.match(line)
+            tag = ()
+            if match and LOG_LEVELS[match.group(2)] >= LOG_LEVELS["ERROR"]:
+                tag = "error"
+            elif match and match.group(2) == "WARNING":
+                tag = "warning"
+            self.text.insert(tk.END, line + "\n", tag)
+        self.text.configure(state=tk.DISABLED)
+
+        if total:
+            self.scrollbar.set(self.top / total, min(1, (self.top + self.rows) / total))
+        else:
+            self.scrollbar.set(0, 1)
+        state = "siguiendo" if self.follow else "en pausa (Fin para seguir)"
+        self.header.configure(
+            text=f" {self.title} · {total} líneas "
+            f"({self.buffer.spilled} en disco) · {state}"
+        )
 
-def show_databases(output_box):
-    output_box.delete(1.0, tk.END)
-    output_box.insert(tk.END, "📊 Listando bases de datos...\n\n")
+    def scroll_to(self, top):
+        total = len(self.buffer)
+        self.top = max(0, min(int(top), total - self.rows))
+        self.follow = self.top >= total - self.rows
+        self.redraw()
+        return "break"
+
+    def scroll_by(self, rows):
+        return self.scroll_to(self.top + rows)
+
+    def on_scroll(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(float(amount) * len(self.buffer))
+        else:
+            step = self.rows if unit == "pages" else 1
+            self.scroll_by(int(amount) * step)
+
+    def on_wheel(self, event):
+        # Windows envía múltiplos de 120, macOS valores pequeños
+        steps = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        return self.scroll_by(-3 * steps)
+
+    def on_resize(self, event):
+        rows = max(1, event.height // self.line_height)
+        if rows != self.rows:
+            self.rows = rows
+            self.redraw()
+
+
+class OutputBox(scrolledtext.ScrolledText):
+    # Salida general: al limpiarla (empieza otra operación) deja de verse el
+    # visor de logs
+    on_clear = None
+
+    def delete(self, index1, index2=None):
+        if index2 == tk.END and self.on_clear is not None:
+            self.on_clear()
+        return super().delete(index1, index2)
+
+    def begin_section(self):
+        # Inicio de una operación: con trabajos en curso no se borra lo que
+        # están escribiendo, la nueva salida empieza tras un separador
+        if not scheduler.has_active_jobs():
+            self.delete(1.0, tk.END)
+            return
+        if self.on_clear is not None:
+            self.on_clear()
+        self.insert(tk.END, "\n" + "─" * 40 + "\n\n")
+        self.see(tk.END)
+
+
+async def follow_container_logs(container):
+    # Mostrar los logs en el visor y guardarlos a la vez en el registro persistente
+    writer = ContainerLogWriter(container)
+    log_view.start(f"📋 Logs de {container}")
+
+    def on_line(line):
+        log_view.append(line)
+        writer.write(line)
+
+    async def flush_idle():
+        while True:
+            await asyncio.sleep(LOG_BLOCK_SECONDS)
+            writer.flush_if_idle()
+
+    idle = asyncio.ensure_future(flush_idle())
+    try:
+        return await stream_command(
+            ["vagrant", "ssh", "-c", f"docker logs -f {container} --tail 300"],
+            on_line,
+        )
+    finally:
+        idle.cancel()
+        writer.close()
 
-    def task():
-        try:
-            # Comando modificado para listar las bases de datos
-            command = "cd ../../;vagrant ssh -c 'docker exec ldb psql -U odoo -l'"
 
-            process = subprocess.Popen(
-                command,
-                shell=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-            )
+def search_saved_logs(output_box):
+    containers = list_saved_log_containers()
+    if not containers:
+        output_box.begin_section()
+        output_box.insert(
+            tk.END,
+            "⚠️ Aún no hay logs guardados: se guardan al seguir los logs "
+            "de un contenedor\n",
+        )
+        return
 
-            databases = []
-            # Saltar la cabecera
-            next(process.stdout)
-            next(process.stdout)
+    dialog = tk.Toplevel(root)
+    dialog.title("Buscar en logs guardados")
+    dialog.geometry("500x480")
+    dialog.configure(bg="#1e1e1e")
 
-            for line in process.stdout:
-                if line.strip() and not line.startswith("-"):
-                    db_name = line.split("|")[0].strip()
-                    if db_name and not db_name.startswith("template"):
-                        databases.append(db_name)
-                        output_box.insert(tk.END, f"💾 {db_name}\n")
-                        output_box.see(tk.END)
+    def label(text):
+        tk.Label(
+            dialog, text=text, font=("Consolas", 12), bg="#1e1e1e", fg="#00FF00"
+        ).pack(pady=(5, 0))
+
+    def entry(value):
+        widget = tk.Entry(
+            dialog,
+            bg="#333",
+            fg="#00FF00",
+            insertbackground="#00FF00",
+            font=("Consolas", 12),
+        )
+        widget.insert(0, value)
+        widget.pack(fill=tk.X, padx=10)
+        return widget
+
+    label("Contenedor:")
+    listbox = tk.Listbox(
+        dialog,
+        bg="#333",
+        fg="#00FF00",
+        font=("Consolas", 12),
+        selectmode=tk.SINGLE,
+        exportselection=False,
+        height=6,
+    )
+    listbox.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+    for container in containers:
+        listbox.insert(tk.END, container)
+    listbox.selection_set(0)
+
+    now = time.time()
+    label("Desde (UTC, AAAA-MM-DD HH:MM):")
+    since_entry = entry(time.strftime("%Y-%m-%d %H:%M", time.gmtime(now - 3600)))
+    label("Hasta (UTC):")
+    until_entry = entry(time.strftime("%Y-%m-%d %H:%M", time.gmtime(now)))
+
+    label("Nivel mínimo:")
+    level_var = tk.StringVar(value="Todos")
+    level_menu = tk.OptionMenu(
+        dialog, level_var, "Todos", "WARNING", "ERROR", "CRITICAL"
+    )
+    level_menu.configure(bg="#333", fg="#00FF00", activebackground="#444")
+    level_menu.pack(pady=5)
+
+    label("Texto (opcional):")
+    text_entry = entry("")
+
+    def search():
+        container = containers[listbox.curselection()[0]]
+        try:
+            since = parse_search_time(since_entry.get())
+            until = parse_search_time(until_entry.get(), end=True)
+        except ValueError as e:
+            output_box.insert(tk.END, f"❌ {str(e)}\n")
+            return
+        min_level = LOG_LEVELS.get(level_var.get(), 0)
+        text = text_entry.get() or None
+        dialog.destroy()
+
+        output_box.begin_section()
+        output_box.insert(tk.END, f"🔎 Buscando en los logs de {container}...\n\n")
+
+        def task():
+            start = time.time()
+            try:
+                lines, blocks, truncated = search_container_logs(
+                    container, since, until, min_level, text
+                )
+            except Exception as e:
+                # e deja de existir al salir del except: fijar el mensaje antes
+                message = str(e)
+                root.after(
+                    0, lambda: output_box.insert(tk.END, f"❌ Error: {message}\n")
+                )
+                return
+            elapsed = (time.time() - start) * 1000
+
+            def show():
+                output_box.insert(tk.END, "\n".join(lines) + "\n" if lines else "")
+                note = f" (solo las primeras {LOG_SEARCH_LIMIT})" if truncated else ""
+                output_box.insert(
+                    tk.END,
+                    f"\n✅ {len(lines)} líneas{note} en {elapsed:.0f} ms, "
+                    f"{blocks} bloques leídos\n",
+                )
+                output_box.see(tk.END)
+
+            root.after(0, show)
+
+        threading.Thread(target=task).start()
+
+    tk.Button(
+        dialog,
+        text="Buscar",
+        font=("Consolas", 12),
+        bg="#333",
+        fg="#00FF00",
+        activebackground="#444",
+        command=search,
+    ).pack(pady=10)
+
+
+def show_container_logs():
+    start_output_task(follow_container_logs("lgdoo"))
+
+
+# Sondeo HTTP de los puertos listados (todas las peticiones a la vez)
+PROBE_PATH = "/web/login"
+PROBE_TIMEOUT = 3.0
+PROBE_INTERVAL = 10
+
+
+async def probe_http(host, port, path=PROBE_PATH, timeout=PROBE_TIMEOUT):
+    # Devuelve (código HTTP o None, latencia en ms, error)
+    start = time.perf_counter()
+    writer = None
+    try:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port), timeout
+        )
+        writer.write(
+            f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\n"
+            f"Connection: close\r\n\r\n".encode()
+        )
+        await writer.drain()
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+        parts = status_line.split()
+        if len(parts) < 2 or not parts[1].isdigit():
+            return None, (time.perf_counter() - start) * 1000, "respuesta no HTTP"
+        return int(parts[1]), (time.perf_counter() - start) * 1000, None
+    except asyncio.TimeoutError:
+        return None, (time.perf_counter() - start) * 1000, "timeout"
+    except OSError as e:
+        return None, (time.perf_counter() - start) * 1000, e.strerror or str(e)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+# Espera de arranque de contenedores Odoo (logs + puerto HTTP)
+VM_IP = "192.168.56.10"
+# Odoo abre el puerto (server.start) antes de precargar la BD: listo es
+# "Registry loaded in"; la línea HTTP solo vale si no empieza ninguna carga
+HTTP_RUNNING_RE = re.compile(r"HTTP service \(werkzeug\) running")
+MODULES_LOADING_RE = re.compile(r"loading \d+ modules\.\.\.")
+REGISTRY_LOG_GRACE = 5
+VM_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}$", re.MULTILINE)
+REGISTRY_LOADED_RE = re.compile(r"Registry loaded in (\d+(?:\.\d+)?)s")
+MODULES_LOADED_RE = re.compile(r"(\d+) modules loaded in (\d+(?:\.\d+)?)s")
+READY_TIMEOUT = 600
+SLOW_MODULE_LOADING = 60
+STARTUP_STATS_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "lgd-helper", "startup-times.json"
+)
+
+
+def load_startup_stats():
+    try:
+        with open(STARTUP_STATS_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def record_startup_time(container_name, result):
+    stats = load_startup_stats()
+    runs = stats.setdefault(container_name, [])
+    runs.append(
+        {
+            "date": time.strftime("%Y-%m-%d %H:%M"),
+            "seconds": round(result["seconds"], 1),
+            "modules_seconds": result["modules_seconds"],
+            "ready_by": result["ready_by"],
+        }
+    )
+    del runs[:-50]
+    os.makedirs(os.path.dirname(STARTUP_STATS_PATH), exist_ok=True)
+    with open(STARTUP_STATS_PATH, "w") as f:
+        json.dump(stats, f, indent=2)
+
+
+def startup_warnings(container_name, result):
+    # Comparar con el límite fijo y con la mediana de arranques anteriores
+    warnings = []
+    modules_seconds = result["modules_seconds"]
+    if modules_seconds and modules_seconds > SLOW_MODULE_LOADING:
+        warnings.append(f"carga de módulos lenta: {modules_seconds:.1f} s")
+    previous = sorted(
+        run["seconds"] for run in load_startup_stats().get(container_name, [])
+    )
+    if len(previous) >= 3:
+        median = previous[len(previous) // 2]
+        if result["seconds"] > median * 1.5:
+            warnings.append(
+                f"arranque {result['seconds']:.1f} s vs mediana {median:.1f} s"
+            )
+    return warnings
+
+
+async def container_http_port(container_name):
+    code, output = await run_command(
+        ["vagrant", "ssh", "-c", f"docker port {shlex.quote(container_name)} 8069"],
+        timeout=60,
+    )
+    match = re.search(r"0\.0\.0\.0:(\d+)", output)
+    return int(match.group(1)) if match else None
+
+
+async def start_container_and_wait(
+    container_name, restart=False, on_line=None, timeout=READY_TIMEOUT
+):
+    # Arrancar el contenedor y volver en cuanto los logs o /web/login
+    # indiquen que Odoo está listo
+    on_line = on_line or (lambda line: None)
+    start = time.monotonic()
+
+    # --since lo filtra el docker de la VM: usar su reloj, que tras un
+    # resume puede ir por detrás del del host
+    action = "restart" if restart else "start"
+    code, output = await run_command(
+        [
+            "vagrant",
+            "ssh",
+            "--no-tty",
+            "-c",
+            f"date -u +%Y-%m-%dT%H:%M:%S && "
+            f"docker {action} {shlex.quote(container_name)}",
+        ],
+        timeout=120,
+    )
+    if code != 0:
+        raise Exception(f"docker {action} falló: {output.strip()}")
+    vm_date = VM_DATE_RE.search(output)
+    since = (
+        vm_date.group(0)
+        if vm_date
+        else time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime())
+    )
+
+    running_loop = asyncio.get_running_loop()
+    ready = running_loop.create_future()
+    modules_seconds = None
+    loading = False
+
+    def ready_unless_loading():
+        if not loading and not ready.done():
+            ready.set_result("logs")
+
+    def on_log_line(line):
+        nonlocal modules_seconds, loading
+        on_line(line)
+        registry = REGISTRY_LOADED_RE.search(line)
+        modules = MODULES_LOADED_RE.search(line)
+        if registry or modules:
+            modules_seconds = float((registry or modules).groups()[-1])
+        if registry:
+            if not ready.done():
+                ready.set_result("logs")
+        elif modules:
+            # Versiones sin la línea "Registry loaded in"
+            loading = False
+            running_loop.call_later(REGISTRY_LOG_GRACE, ready_unless_loading)
+        elif MODULES_LOADING_RE.search(line):
+            loading = True
+        elif HTTP_RUNNING_RE.search(line):
+            # Sin BD precargada no habrá carga de módulos tras el arranque
+            running_loop.call_later(REGISTRY_LOG_GRACE, ready_unless_loading)
+
+    async def follow_logs():
+        await stream_command(
+            [
+                "vagrant",
+                "ssh",
+                "-c",
+                f"docker logs -f --since {since} {shlex.quote(container_name)}",
+            ],
+            on_log_line,
+        )
+        if not ready.done():
+            ready.set_exception(Exception("El contenedor terminó antes de estar listo"))
+
+    async def probe_port():
+        port = await container_http_port(container_name)
+        if port is None:
+            return
+        while not ready.done():
+            status, latency, error = await probe_http(VM_IP, port)
+            if status is not None and status < 500 and not ready.done():
+                ready.set_result("http")
+                return
+            await asyncio.sleep(1)
+
+    watchers = [
+        asyncio.ensure_future(follow_logs()),
+        asyncio.ensure_future(probe_port()),
+    ]
+    try:
+        ready_by = await asyncio.wait_for(asyncio.shield(ready), timeout)
+    finally:
+        for watcher in watchers:
+            watcher.cancel()
+        await asyncio.gather(*watchers, return_exceptions=True)
+
+    result = {
+        "ready_by": ready_by,
+        "seconds": time.monotonic() - start,
+        "modules_seconds": modules_seconds,
+    }
+    result["warnings"] = startup_warnings(container_name, result)
+    record_startup_time(container_name, result)
+    return result
+
+
+def format_startup_result(container_name, result):
+    text = (
+        f"✅ {container_name} listo en {result['seconds']:.1f} s "
+        f"(detectado por {'logs' if result['ready_by'] == 'logs' else '/web/login'})\n"
+    )
+    for warning in result["warnings"]:
+        text += f"🐢 {warning}\n"
+    return text
+
+
+def start_container_with_wait(output_box, restart=False):
+    def on_project(project_name):
+        container_name = project_db_name(project_name)
+        output_box.begin_section()
+        output_box.insert(
+            tk.END,
+            f"{'🔁 Reiniciando' if restart else '🚀 Iniciando'} {container_name}...\n\n",
+        )
+
+        async def task():
+            try:
+                result = await start_container_and_wait(
+                    container_name,
+                    restart,
+                    lambda line: append_output(output_box, line),
+                )
+                append_output(
+                    output_box, "\n" + format_startup_result(container_name, result)
+                )
+            except asyncio.TimeoutError:
+                append_output(
+                    output_box, f"\n❌ {container_name} no respondió a tiempo\n"
+                )
+            except Exception as e:
+                append_output(output_box, f"\n❌ Error: {str(e)}\n")
+
+        start_output_task(task())
+
+    select_project_dialog("Seleccionar Proyecto", on_project)
+
+
+def run_cli(args):
+    # Uso desde las tareas de VS Code: python3 gui.py start-container NOMBRE [--restart]
+    if len(args) >= 2 and args[0] == "start-container":
+        container_name = args[1]
+        restart = "--restart" in args[2:]
+        try:
+            result = asyncio.run(
+                start_container_and_wait(
+                    container_name,
+                    restart,
+                    lambda line: print(line, end="", flush=True),
+                )
+            )
+        except asyncio.TimeoutError:
+            print(f"\n❌ {container_name} no respondió a tiempo")
+            return 1
+        except Exception as e:
+            print(f"\n❌ Error: {str(e)}")
+            return 1
+        print("\n" + format_startup_result(container_name, result), end="")
+        return 0
+
+    print("Uso: gui.py start-container NOMBRE [--restart]")
+    return 2
+
+
+def list_container_ports(output_box):
+    output_box.delete(1.0, tk.END)
+    output_box.insert(tk.END, "🔍 Contenedores en ejecución:\n\n")
+
+    # Configurar el tag para los hipervínculos
+    output_box.tag_config("link", foreground="cyan", underline=1)
+
+    def open_url(url):
+        import webbrowser
+
+        webbrowser.open(url)
+
+    def tag_click(event):
+        # Obtener el índice del click
+        index = output_box.index(f"@{event.x},{event.y}")
+        # Obtener los tags en esa posición
+        tags = output_box.tag_names(index)
+        for tag in tags:
+            if tag.startswith("link_"):
+                url = tag.split("link_")[1]
+                open_url(url)
+                break
+
+    # Bindear el evento de click
+    output_box.tag_bind("link", "<Button-1>", tag_click)
+    output_box.config(cursor="arrow")
+
+    # Colores del estado de cada enlace
+    output_box.tag_config("probe_ok", foreground="#00FF00")
+    output_box.tag_config("probe_warn", foreground="yellow")
+    output_box.tag_config("probe_down", foreground="red")
+
+    vm_ip = VM_IP
+    ports_to_probe = []
+
+    def on_line(line):
+        if line.strip():
+            parts = line.strip().split("|")
+            container_name = parts[0]
+            image_name = parts[1]
+            ports = parts[2] if len(parts) > 2 else ""
+
+            output_box.insert(tk.END, f"📦 Contenedor: {container_name}\n")
+            output_box.insert(tk.END, f"   🖼️ Imagen: {image_name}\n")
+
+            # Buscar puertos mapeados
+            matches = re.finditer(r"0.0.0.0:(\d+)", ports)
+            ports_found = False
+
+            for match in matches:
+                ports_found = True
+                port = match.group(1)
+                url = f"http://{vm_ip}:{port}"
+
+                # Insertar el enlace con formato especial
+                output_box.insert(tk.END, "   🔗 ")
+                start_index = output_box.index("end-1c")
+                output_box.insert(tk.END, url)
+                end_index = output_box.index("end-1c")
+
+                # Hueco para el estado HTTP, actualizado en segundo plano
+                output_box.insert(tk.END, "  ")
+                output_box.mark_set(f"probe_{port}", "end-1c")
+                output_box.mark_gravity(f"probe_{port}", tk.LEFT)
+                output_box.insert(tk.END, "⏳\n")
+                ports_to_probe.append(port)
+
+                # Aplicar tags para el hipervínculo
+                output_box.tag_add(
+                    f"link_http://{vm_ip}:{port}", start_index, end_index
+                )
+                output_box.tag_add("link", start_index, end_index)
+
+            if not ports_found:
+                output_box.insert(tk.END, "   ⚠️ Sin puertos mapeados\n")
+
+            output_box.insert(tk.END, "\n")
+
+    async def task():
+        await stream_command(
+            [
+                "vagrant",
+                "ssh",
+                "-c",
+                "docker ps --format '{{.Names}}|{{.Image}}|{{.Ports}}'",
+            ],
+            on_line,
+            timeout=120,
+        )
+        output_box.insert(tk.END, "\n✅ Listado completado.\n")
+        output_box.see(tk.END)
+
+        if ports_to_probe:
+            start_probe_task(probe_ports())
+
+    async def probe_ports():
+        # Sondear todos los puertos en paralelo; stop_probe_task lo cancela
+        # cuando el listado deja de verse
+        generation = _probe_generation
+        while True:
+            results = await asyncio.gather(
+                *(probe_http(vm_ip, port) for port in ports_to_probe)
+            )
+            if generation != _probe_generation:
+                return
+            for port, (status, latency, error) in zip(ports_to_probe, results):
+                mark = f"probe_{port}"
+                if status is None:
+                    text, tag = f"❌ {error} ({latency:.0f} ms)", "probe_down"
+                else:
+                    tag = "probe_ok" if status < 400 else "probe_warn"
+                    text = (
+                        f"{'✅' if status < 400 else '⚠️'} {status} ({latency:.0f} ms)"
+                    )
+                output_box.delete(mark, f"{mark} lineend")
+                output_box.insert(mark, text, tag)
+            await asyncio.sleep(PROBE_INTERVAL)
+
+    start_output_task(task())
+
+
+def show_databases(output_box):
+    output_box.begin_section()
+    output_box.insert(tk.END, "📊 Listando bases de datos...\n\n")
+
+    def task():
+        try:
+            start = time.time()
+            databases = []
+            for db in list_databases():
+                # Las plantillas (template0/template1 y clones marcados) no se listan
+                if db["is_template"]:
+                    continue
+                databases.append(db["name"])
+                output_box.insert(
+                    tk.END,
+                    f"💾 {db['name']}  ({db['size_pretty']}, "
+                    f"{db['connections']} conexiones)\n",
+                )
+            output_box.see(tk.END)
 
             if not databases:
                 output_box.insert(tk.END, "⚠️ No se encontraron bases de datos\n")
 
-            output_box.insert(tk.END, "\n✅ Listado completado.\n")
+            output_box.insert(
+                tk.END,
+                f"\n✅ Listado completado en {(time.time() - start) * 1000:.0f} ms.\n",
+            )
 
             # Crear selector de base de datos
             selector = tk.Toplevel(root)
@@ -401,74 +2006,1816 @@ def show_databases(output_box):
                     selector.destroy()
                     delete_selected_database(selected_db, output_box)
 
-            delete_btn = tk.Button(
-                selector,
-                text="🗑️ Eliminar Base de Datos",
+            delete_btn = tk.Button(
+                selector,
+                text="🗑️ Eliminar Base de Datos",
+                font=("Consolas", 12),
+                bg="#333",
+                fg="#00FF00",
+                command=on_delete,
+            )
+            delete_btn.pack(pady=10)
+
+        except Exception as e:
+            output_box.insert(
+                tk.END, f"\n❌ Error al listar las bases de datos: {str(e)}\n"
+            )
+
+    threading.Thread(target=task).start()
+
+
+def delete_selected_database(db_name, output_box):
+    output_box.begin_section()
+    output_box.insert(tk.END, f"🗑️ Eliminando base de datos '{db_name}'...\n\n")
+
+    def task():
+        try:
+            # Primero detenemos el contenedor que usa la base de datos
+            output_box.insert(tk.END, f"🛑 Deteniendo contenedor '{db_name}'...\n")
+            stop_command = f"cd ../../;vagrant ssh -c 'docker stop {db_name}'"
+            output_box.insert(tk.END, f"Ejecutando: {stop_command}\n")
+
+            process = subprocess.Popen(
+                stop_command,
+                shell=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+            )
+
+            for line in process.stdout:
+                output_box.insert(tk.END, line)
+                output_box.see(tk.END)
+
+            # Ahora sí eliminamos la base de datos
+            output_box.insert(tk.END, "🗑️ Eliminando base de datos anterior...\n")
+            drop_database(db_name)
+
+            output_box.insert(
+                tk.END, f"\n✅ Base de datos '{db_name}' eliminada correctamente.\n"
+            )
+        except Exception as e:
+            output_box.insert(
+                tk.END, f"\n❌ Error al eliminar la base de datos: {str(e)}\n"
+            )
+            # Relanzar para que la cola marque el trabajo como fallido
+            raise
+
+    submit_job(f"Eliminar {db_name}", [project_lock(db_name)], task, output_box)
+
+
+def run_in_vm(command, timeout=None, input=None):
+    # Ejecutar un comando en la VM y devolver (código, salida). --no-tty: si
+    # gui.py se lanza desde una terminal vagrant pide un pty, que cambia \n por
+    # \r\n y corrompe dumps, tar y salidas que se analizan
+    process = subprocess.run(
+        ["vagrant", "ssh", "--no-tty", "-c", command],
+        input=input,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        timeout=timeout,
+    )
+    return process.returncode, process.stdout
+
+
+def list_projects():
+    default_path = os.path.join(os.getcwd(), "dev")
+    if not os.path.exists(default_path):
+        os.makedirs(default_path)
+
+    return sorted(
+        d
+        for d in os.listdir(default_path)
+        if os.path.isdir(os.path.join(default_path, d)) and d != "temp"
+    )
+
+
+def select_project_dialog(title, on_select):
+    selector = tk.Toplevel(root)
+    selector.title(title)
+    selector.geometry("400x300")
+    selector.configure(bg="#1e1e1e")
+
+    listbox = tk.Listbox(
+        selector,
+        bg="#333",
+        fg="#00FF00",
+        font=("Consolas", 12),
+        selectmode=tk.SINGLE,
+    )
+    listbox.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+    for folder in list_projects():
+        listbox.insert(tk.END, folder)
+
+    def on_project_select():
+        if listbox.curselection():
+            selected_project = listbox.get(listbox.curselection())
+            selector.destroy()
+            on_select(selected_project)
+
+    tk.Button(
+        selector,
+        text="✅ Seleccionar Proyecto",
+        font=("Consolas", 12),
+        bg="#333",
+        fg="#00FF00",
+        command=on_project_select,
+    ).pack(pady=10)
+
+
+def project_db_name(project_name):
+    user_dev = os.getenv("USERDEV", "controlcdms-gh")
+    return f"{project_name}-local-{user_dev}"
+
+
+def vm_filestore_path(db_name):
+    return f"/opt/odoo/staging/{db_name}/filestore/{db_name}"
+
+
+# Checkpoints de base de datos + filestore por proyecto
+CHECKPOINT_NAME_RE = re.compile(r"^[A-Za-z0-9_-]{1,32}$")
+
+
+def checkpoint_db_name(db_name, checkpoint):
+    return f"{db_name}-ckpt-{checkpoint}"
+
+
+def checkpoint_filestore_path(db_name, checkpoint):
+    return f"/opt/odoo/staging/{db_name}/checkpoints/{checkpoint}"
+
+
+def container_is_running(container_name):
+    code, output = run_in_vm(
+        f"docker inspect -f '{{{{.State.Running}}}}' {shlex.quote(container_name)}",
+        timeout=60,
+    )
+    return code == 0 and output.strip().endswith("true")
+
+
+def copy_tree_in_vm(source, target):
+    # Reflink si el sistema de ficheros lo permite, si no enlaces duros (cp -al);
+    # los ficheros del filestore de Odoo no se modifican, solo se crean o borran
+    source, target = shlex.quote(source), shlex.quote(target)
+    return (
+        f"sudo mkdir -p $(dirname {target}) && "
+        f"(sudo cp -a --reflink=always {source} {target} 2>/dev/null "
+        f"|| (sudo rm -rf {target} && sudo cp -al {source} {target}))"
+    )
+
+
+def list_checkpoints(db_name):
+    prefix = checkpoint_db_name(db_name, "")
+    checkpoints = {}
+    for db in list_databases():
+        if db["name"].startswith(prefix):
+            checkpoints[db["name"][len(prefix) :]] = {
+                "db_size": db["size"],
+                "db_size_pretty": db["size_pretty"],
+                "filestore_size": 0,
+            }
+
+    base = checkpoint_filestore_path(db_name, "")
+    code, output = run_in_vm(
+        f"sudo du -sb {shlex.quote(base)}* 2>/dev/null", timeout=120
+    )
+    for line in output.splitlines():
+        parts = line.split("\t", 1)
+        if len(parts) == 2 and parts[0].isdigit():
+            name = os.path.basename(parts[1].strip())
+            if name in checkpoints:
+                checkpoints[name]["filestore_size"] = int(parts[0])
+    return checkpoints
+
+
+def create_checkpoint(db_name, checkpoint, output_box):
+    ckpt_db = checkpoint_db_name(db_name, checkpoint)
+    was_running = container_is_running(db_name)
+
+    # Con Odoo en marcha (cron, bus, navegador) la plantilla vuelve a tener
+    # conexiones y el CREATE DATABASE ... TEMPLATE falla; parado, además,
+    # el filestore copiado coincide con la BD
+    if was_running:
+        output_box.insert(tk.END, f"🛑 Deteniendo contenedor '{db_name}'...\n")
+        run_in_vm(f"docker stop {shlex.quote(db_name)}")
+    try:
+        output_box.insert(tk.END, f"📸 Clonando '{db_name}' en '{ckpt_db}'...\n")
+        drop_checkpoint_database(ckpt_db)
+        create_database(ckpt_db, template=db_name)
+        # Marcarla como plantilla la oculta del listado y acelera el rollback
+        run_sql(
+            f"ALTER DATABASE {quote_ident(ckpt_db)} IS_TEMPLATE true", autocommit=True
+        )
+
+        output_box.insert(tk.END, "📁 Guardando snapshot del filestore...\n")
+        source = vm_filestore_path(db_name)
+        target = checkpoint_filestore_path(db_name, checkpoint)
+        code, output = run_in_vm(
+            f"sudo rm -rf {shlex.quote(target)} && "
+            f"if sudo test -d {shlex.quote(source)}; then "
+            f"{copy_tree_in_vm(source, target)}; "
+            f"else sudo mkdir -p {shlex.quote(target)}; fi"
+        )
+        if code != 0:
+            raise Exception(f"No se pudo copiar el filestore: {output.strip()}")
+    finally:
+        if was_running:
+            output_box.insert(tk.END, f"🚀 Iniciando contenedor '{db_name}'...\n")
+            run_in_vm(f"docker start {shlex.quote(db_name)}")
+
+
+def drop_checkpoint_database(ckpt_db):
+    rows = run_sql("SELECT 1 FROM pg_database WHERE datname = %s", (ckpt_db,))
+    if rows:
+        run_sql(
+            f"ALTER DATABASE {quote_ident(ckpt_db)} IS_TEMPLATE false",
+            autocommit=True,
+        )
+        drop_database(ckpt_db)
+
+
+def delete_checkpoint(db_name, checkpoint):
+    drop_checkpoint_database(checkpoint_db_name(db_name, checkpoint))
+    target = checkpoint_filestore_path(db_name, checkpoint)
+    run_in_vm(f"sudo rm -rf {shlex.quote(target)}")
+
+
+def rollback_checkpoint(db_name, checkpoint, output_box):
+    ckpt_db = checkpoint_db_name(db_name, checkpoint)
+    was_running = container_is_running(db_name)
+
+    rollback_db = f"{db_name}-rollback"
+    if not db_name_fits(rollback_db):
+        rollback_db = f"rollback-{hashlib.sha1(db_name.encode()).hexdigest()[:16]}"
+
+    output_box.insert(tk.END, f"🛑 Deteniendo contenedor '{db_name}'...\n")
+    run_in_vm(f"docker stop {shlex.quote(db_name)}")
+    try:
+        # Se crea la copia aparte y solo después se intercambia: si el
+        # CREATE falla, la BD del proyecto sigue intacta
+        output_box.insert(tk.END, f"⏪ Restaurando '{db_name}' desde '{ckpt_db}'...\n")
+        drop_database(rollback_db)
+        create_database(rollback_db, template=ckpt_db)
+        drop_database(db_name)
+        run_sql(
+            f"ALTER DATABASE {quote_ident(rollback_db)} "
+            f"RENAME TO {quote_ident(db_name)}",
+            autocommit=True,
+        )
+
+        output_box.insert(tk.END, "📁 Restaurando filestore...\n")
+        source = checkpoint_filestore_path(db_name, checkpoint)
+        target = vm_filestore_path(db_name)
+        staging = shlex.quote(target + ".rollback")
+        code, output = run_in_vm(
+            f"sudo rm -rf {staging} && "
+            f"{copy_tree_in_vm(source, target + '.rollback')} && "
+            f"sudo rm -rf {shlex.quote(target)} && "
+            f"sudo mv {staging} {shlex.quote(target)}"
+        )
+        if code != 0:
+            raise Exception(f"No se pudo restaurar el filestore: {output.strip()}")
+    finally:
+        if was_running:
+            output_box.insert(tk.END, f"🚀 Iniciando contenedor '{db_name}'...\n")
+            run_in_vm(f"docker start {shlex.quote(db_name)}")
+
+
+def format_size(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+# Exportación de respaldos (mismo formato que restaura process_backup_file)
+STREAM_CHUNK_SIZE = 1024 * 1024
+RESTORE_JOBS = int(os.getenv("LGD_RESTORE_JOBS", str(min(os.cpu_count() or 2, 8))))
+
+# Cabeceras de adjuntos ya comprimidos (el filestore de Odoo no guarda
+# extensiones): se guardan en el ZIP sin volver a comprimir
+COMPRESSED_MAGIC = (
+    b"\xff\xd8\xff",  # JPEG
+    b"\x89PNG",
+    b"GIF8",
+    b"RIFF",  # WEBP / AVI
+    b"%PDF",
+    b"PK\x03\x04",  # ZIP, docx, xlsx, odt...
+    b"\x1f\x8b",  # gzip
+    b"\x28\xb5\x2f\xfd",  # zstd
+    b"\xfd7zXZ",  # xz
+    b"BZh",
+    b"7z\xbc\xaf",
+    b"ID3",  # mp3
+)
+
+
+def is_compressed_data(head):
+    return head.startswith(COMPRESSED_MAGIC) or head[4:8] == b"ftyp"
+
+
+def copy_stream_threaded(source, target, chunk_size=STREAM_CHUNK_SIZE):
+    # Leer en un hilo y escribir/comprimir en otro; zlib libera el GIL, así
+    # la lectura por SSH y la compresión se solapan sin pasar por disco
+    chunks = queue.Queue(maxsize=16)
+    errors = []
+
+    def reader():
+        try:
+            while True:
+                chunk = source.read(chunk_size)
+                chunks.put(chunk)
+                if not chunk:
+                    break
+        except Exception as e:
+            errors.append(e)
+            chunks.put(b"")
+
+    thread = threading.Thread(target=reader, daemon=True)
+    thread.start()
+
+    total = 0
+    while True:
+        chunk = chunks.get()
+        if not chunk:
+            break
+        target.write(chunk)
+        total += len(chunk)
+    thread.join()
+    if errors:
+        raise errors[0]
+    return total
+
+
+def build_manifest(db_name):
+    modules = run_sql(
+        "SELECT name, latest_version FROM ir_module_module "
+        "WHERE state = 'installed' ORDER BY name",
+        dbname=db_name,
+    )
+    pg_version = run_sql("SHOW server_version")[0][0]
+    version = ""
+    base_version = dict(modules).get("base") or ""
+    if base_version:
+        version = ".".join(base_version.split(".")[:2])
+    return {
+        "odoo_dump": "1",
+        "db_name": db_name,
+        "version": version,
+        "pg_version": pg_version,
+        "modules": {name: module_version for name, module_version in modules},
+    }
+
+
+def export_backup(db_name, zip_path, output_box, custom_format=False):
+    partial_path = zip_path + ".part"
+    start = time.time()
+
+    with zipfile.ZipFile(
+        partial_path, "w", zipfile.ZIP_DEFLATED, allowZip64=True, compresslevel=6
+    ) as zip_out:
+        output_box.insert(tk.END, "📝 Generando manifest.json...\n")
+        zip_out.writestr("manifest.json", json.dumps(build_manifest(db_name), indent=4))
+
+        # Volcado de la base de datos directamente desde pg_dump
+        if custom_format:
+            # Formato custom: comprimido por pg_dump, restaurable con pg_restore -j
+            member = zipfile.ZipInfo("dump.dump", time.localtime()[:6])
+            member.compress_type = zipfile.ZIP_STORED
+            dump_command = (
+                f"docker exec {LDB_CONTAINER} pg_dump -U {LDB_USER} "
+                f"--no-owner -Fc -Z 6 {shlex.quote(db_name)}"
+            )
+        else:
+            member = zipfile.ZipInfo("dump.sql", time.localtime()[:6])
+            member.compress_type = zipfile.ZIP_DEFLATED
+            dump_command = (
+                f"docker exec {LDB_CONTAINER} pg_dump -U {LDB_USER} "
+                f"--no-owner {shlex.quote(db_name)}"
+            )
+
+        output_box.insert(tk.END, f"📤 Exportando {member.filename}...\n")
+        process = subprocess.Popen(
+            ["vagrant", "ssh", "--no-tty", "-c", dump_command],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        with zip_out.open(member, "w", force_zip64=True) as target:
+            size = copy_stream_threaded(process.stdout, target)
+        stderr = process.stderr.read().decode(errors="replace")
+        if process.wait() != 0:
+            raise Exception(f"pg_dump falló: {stderr.strip()}")
+        output_box.insert(tk.END, f"   {format_size(size)} exportados\n")
+
+        # Filestore: tar por SSH leído como stream, un miembro del ZIP por fichero
+        output_box.insert(tk.END, "📁 Exportando filestore...\n")
+        filestore = shlex.quote(vm_filestore_path(db_name))
+        process = subprocess.Popen(
+            [
+                "vagrant",
+                "ssh",
+                "--no-tty",
+                "-c",
+                f"if sudo test -d {filestore}; then sudo tar -C {filestore} -cf - .; fi",
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        files = 0
+        try:
+            # Sin filestore en la VM tar no envía nada; un tar cortado a medias
+            # (SSH caído) sí es un error y no se ignora
+            if process.stdout.peek(1):
+                with tarfile.open(fileobj=process.stdout, mode="r|") as tar:
+                    for entry in tar:
+                        if not entry.isfile():
+                            continue
+                        name = os.path.normpath(entry.name)
+                        info = zipfile.ZipInfo(
+                            f"filestore/{name}", time.localtime(entry.mtime)[:6]
+                        )
+                        source = tar.extractfile(entry)
+                        head = source.read(STREAM_CHUNK_SIZE)
+                        info.compress_type = (
+                            zipfile.ZIP_STORED
+                            if is_compressed_data(head)
+                            else zipfile.ZIP_DEFLATED
+                        )
+                        with zip_out.open(info, "w", force_zip64=True) as target:
+                            target.write(head)
+                            shutil.copyfileobj(source, target, STREAM_CHUNK_SIZE)
+                        files += 1
+            process.stdout.read()
+        except BaseException:
+            process.kill()
+            process.wait()
+            raise
+        stderr = process.stderr.read().decode(errors="replace")
+        code = process.wait()
+        # tar devuelve 1 si un fichero cambió durante la lectura: solo avisar
+        if code == 1 and "file changed as we read it" in stderr:
+            output_box.insert(tk.END, f"   ⚠️ {stderr.strip()}\n")
+        elif code != 0:
+            raise Exception(f"tar del filestore falló: {stderr.strip()}")
+        output_box.insert(tk.END, f"   {files} ficheros en el filestore\n")
+
+    os.replace(partial_path, zip_path)
+    output_box.insert(
+        tk.END,
+        f"\n✅ Respaldo exportado en {time.time() - start:.1f} s: {zip_path} "
+        f"({format_size(os.path.getsize(zip_path))})\n",
+    )
+
+
+def export_database(output_box):
+    output_box.begin_section()
+    output_box.insert(tk.END, "📤 Preparando exportación de base de datos...\n\n")
+
+    def select_options(project_name):
+        db_name = project_db_name(project_name)
+
+        selector = tk.Toplevel(root)
+        selector.title(f"Exportar {db_name}")
+        selector.geometry("400x160")
+        selector.configure(bg="#1e1e1e")
+
+        custom_format = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            selector,
+            text="Formato custom (pg_restore -j)",
+            variable=custom_format,
+            font=("Consolas", 12),
+            bg="#1e1e1e",
+            fg="#00FF00",
+            selectcolor="#333",
+            activebackground="#1e1e1e",
+        ).pack(pady=10)
+
+        def on_export():
+            use_custom = custom_format.get()
+            selector.destroy()
+            # En el home, donde el selector de restauración busca los ZIP
+            zip_path = os.path.join(
+                os.path.expanduser("~"),
+                f"{db_name}_{time.strftime('%Y-%m-%d_%H-%M-%S')}.zip",
+            )
+
+            def task():
+                try:
+                    export_backup(db_name, zip_path, output_box, use_custom)
+                except Exception as e:
+                    output_box.insert(
+                        tk.END, f"\n❌ Error al exportar la base de datos: {str(e)}\n"
+                    )
+                    if os.path.exists(zip_path + ".part"):
+                        os.remove(zip_path + ".part")
+                    raise
+                finally:
+                    output_box.see(tk.END)
+
+            submit_job(
+                f"Exportar {db_name}",
+                [project_lock(db_name)],
+                task,
+                output_box,
+                heavy=True,
+            )
+
+        tk.Button(
+            selector,
+            text="📤 Exportar",
+            font=("Consolas", 12),
+            bg="#333",
+            fg="#00FF00",
+            command=on_export,
+        ).pack(pady=10)
+
+    select_project_dialog("Seleccionar Proyecto a Exportar", select_options)
+
+
+# Lectura de respaldos comprimidos (detectados por cabecera, no por extensión)
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+ZIP_MAGIC = b"PK\x03\x04"
+BACKUP_EXTENSIONS = (".zip", ".gz", ".tgz", ".zst", ".tzst", ".tar", ".sql", ".dump")
+
+try:
+    import zstandard
+except ImportError:  # Se usa el binario zstd si está instalado
+    zstandard = None
+
+
+def open_decompressed(path, codec):
+    # Devuelve (stream, proceso); los binarios pigz/zstd descomprimen en
+    # hilos propios y liberan a Python de ese trabajo
+    if codec is None:
+        return open(path, "rb"), None
+
+    if codec == "gzip":
+        command = ["pigz", "-dc", path] if shutil.which("pigz") else None
+        if command is None:
+            return gzip.open(path, "rb"), None
+    elif codec == "zstd":
+        if shutil.which("zstd"):
+            command = ["zstd", "-dc", "-T0", "--long=31", path]
+        elif zstandard is not None:
+            decompressor = zstandard.ZstdDecompressor(max_window_size=2**31)
+            return (
+                decompressor.stream_reader(
+                    open(path, "rb"), read_size=STREAM_CHUNK_SIZE, closefd=True
+                ),
+                None,
+            )
+        else:
+            raise Exception("Para respaldos .zst instala zstd o python-zstandard")
+    else:
+        raise Exception(f"Compresión no soportada: {codec}")
+
+    process = subprocess.Popen(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        bufsize=STREAM_CHUNK_SIZE,
+    )
+    return process.stdout, process
+
+
+def close_decompressed(stream, process):
+    stream.close()
+    if process is not None:
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+
+
+def detect_backup_format(path):
+    # (contenedor, compresión): contenedor es "zip", "tar", "sql" o "dump"
+    with open(path, "rb") as f:
+        head = f.read(512)
+
+    if head.startswith(ZIP_MAGIC):
+        return "zip", None
+
+    codec = None
+    if head.startswith(GZIP_MAGIC):
+        codec = "gzip"
+    elif head.startswith(ZSTD_MAGIC):
+        codec = "zstd"
+
+    if codec is not None:
+        stream, process = open_decompressed(path, codec)
+        try:
+            head = stream.read(512)
+        finally:
+            close_decompressed(stream, process)
+
+    if head[257:262] == b"ustar":
+        return "tar", codec
+    if head.startswith(b"PGDMP"):
+        return "dump", codec
+    return "sql", codec
+
+
+# Restauración selectiva: filtro de bloques COPY ... FROM stdin;
+COPY_RE = re.compile(
+    rb'^COPY\s+(?:(?:\w+|"[^"]+")\.)?(\w+|"[^"]+")\s*(?:\(.*\))?\s+FROM\s+stdin;'
+)
+DEFAULT_SKIP_TABLES = (
+    "mail_message",
+    "mail_tracking_value",
+    "mail_notification",
+    "mail_mail",
+    "mail_message_res_partner_rel",
+    "message_attachment_rel",
+    "bus_bus",
+    "ir_logging",
+    "auditlog_log",
+    "auditlog_log_line",
+)
+DUMP_INDEX_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "lgd-helper", "dump-index"
+)
+CONFIG_PATH = os.path.join(os.getcwd(), "config.json")
+
+
+def load_config():
+    # Mismo config.json que usa la extensión de VS Code
+    try:
+        with open(CONFIG_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"priorityFolders": [], "devPath": "./dev", "lastSelectedFolder": None}
+
+
+def save_config(config):
+    with open(CONFIG_PATH, "w") as f:
+        json.dump(config, f, indent=2)
+
+
+def filter_copy_blocks(source, skip_tables=(), on_block=None, skip_all=False):
+    # Recorre el volcado por bloques: las sentencias SQL se examinan línea a
+    # línea y los datos de COPY se saltan buscando el terminador "\."
+    skip_tables = set(skip_tables)
+    buffer = b""
+    offset = 0
+    in_copy = False
+    skip = False
+    table = None
+    data_start = 0
+    rows = 0
+
+    while True:
+        chunk = source.read(STREAM_CHUNK_SIZE)
+        eof = not chunk
+        buffer += chunk
+        pos = 0
+        out = []
+
+        while True:
+            if not in_copy:
+                newline = buffer.find(b"\n", pos)
+                if newline < 0:
+                    break
+                line = buffer[pos : newline + 1]
+                out.append(line)
+                pos = newline + 1
+                match = COPY_RE.match(line)
+                if match:
+                    in_copy = True
+                    table = match.group(1).strip(b'"').decode()
+                    skip = skip_all or table in skip_tables
+                    data_start = offset + pos
+                    rows = 0
+                continue
+
+            if buffer.startswith(b"\\.\n", pos):
+                end = pos
+            else:
+                terminator = buffer.find(b"\n\\.\n", pos)
+                if terminator < 0:
+                    # Dejar la última línea incompleta para la siguiente lectura
+                    last_newline = buffer.rfind(b"\n", pos)
+                    if last_newline > pos:
+                        rows += buffer.count(b"\n", pos, last_newline)
+                        if not skip:
+                            out.append(buffer[pos:last_newline])
+                        pos = last_newline
+                    break
+                end = terminator + 1
+
+            rows += buffer.count(b"\n", pos, end)
+            if not skip:
+                out.append(buffer[pos:end])
+            out.append(b"\\.\n")
+            if on_block is not None:
+                on_block(table, data_start, offset + end - data_start, rows, skip)
+            pos = end + 3
+            in_copy = False
+
+        offset += pos
+        buffer = buffer[pos:]
+        if out:
+            yield b"".join(out)
+        if eof:
+            if buffer:
+                yield buffer
+            return
+
+
+class FilteredDump:
+    # Adaptador de filter_copy_blocks con la interfaz read() de un fichero
+    def __init__(self, source, skip_tables=(), on_block=None):
+        self.blocks = filter_copy_blocks(source, skip_tables, on_block)
+
+    def read(self, size=-1):
+        for block in self.blocks:
+            if block:
+                return block
+        return b""
+
+
+def open_dump_sql(backup_file):
+    # Devuelve (stream de dump.sql, función para cerrarlo)
+    backup_format, codec = detect_backup_format(backup_file)
+    if backup_format == "zip":
+        zip_ref = zipfile.ZipFile(backup_file, "r")
+        if "dump.sql" not in zip_ref.namelist():
+            zip_ref.close()
+            raise Exception("No se encontró el archivo dump.sql en el ZIP")
+        source = zip_ref.open("dump.sql")
+        return source, lambda: (source.close(), zip_ref.close())
+
+    stream, process = open_decompressed(backup_file, codec)
+    if backup_format == "sql":
+        return stream, lambda: close_decompressed(stream, process)
+    if backup_format == "tar":
+        tar = tarfile.open(fileobj=stream, mode="r|")
+        for entry in tar:
+            if os.path.normpath(entry.name) == "dump.sql" and entry.isfile():
+                return tar.extractfile(entry), lambda: (
+                    tar.close(),
+                    close_decompressed(stream, process),
+                )
+        tar.close()
+    close_decompressed(stream, process)
+    raise Exception("No se encontró el archivo dump.sql en el respaldo")
+
+
+def dump_index_path(backup_file):
+    stat = os.stat(backup_file)
+    key = f"{os.path.abspath(backup_file)}|{stat.st_size}|{stat.st_mtime_ns}"
+    return os.path.join(
+        DUMP_INDEX_DIR, hashlib.sha1(key.encode()).hexdigest() + ".json"
+    )
+
+
+def build_dump_index(backup_file):
+    # Índice (tabla, offset de los datos, tamaño, filas), calculado una sola vez
+    index_path = dump_index_path(backup_file)
+    if os.path.exists(index_path):
+        with open(index_path) as f:
+            return json.load(f)
+
+    tables = []
+
+    def on_block(table, offset, size, rows, skipped):
+        tables.append({"table": table, "offset": offset, "size": size, "rows": rows})
+
+    source, close = open_dump_sql(backup_file)
+    try:
+        # Se saltan todas las tablas: solo interesa recorrer y medir
+        for _ in filter_copy_blocks(source, on_block=on_block, skip_all=True):
+            pass
+    finally:
+        close()
+
+    tables.sort(key=lambda t: t["size"], reverse=True)
+    os.makedirs(DUMP_INDEX_DIR, exist_ok=True)
+    with open(index_path, "w") as f:
+        json.dump(tables, f)
+    return tables
+
+
+# Resumen de la salida de psql/pg_restore: contadores en vivo en la interfaz
+# y salida completa en un log comprimido aparte
+RESTORE_LOG_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "lgd-helper", "restore-logs"
+)
+RESTORE_OUTPUT_PATTERNS = (
+    ("tables", re.compile(r"^(?:CREATE TABLE\b|pg_restore: creating TABLE )")),
+    (
+        "indexes",
+        re.compile(r"^(?:CREATE (?:UNIQUE )?INDEX\b|pg_restore: creating INDEX )"),
+    ),
+    (
+        "constraints",
+        re.compile(r"^(?:ALTER TABLE\b|pg_restore: creating (?:FK )?CONSTRAINT )"),
+    ),
+    (
+        "sequences",
+        re.compile(r"^(?:CREATE SEQUENCE\b|pg_restore: creating SEQUENCE )"),
+    ),
+    ("functions", re.compile(r"^CREATE (?:FUNCTION|PROCEDURE|TRIGGER)\b")),
+    ("views", re.compile(r"^CREATE (?:MATERIALIZED )?VIEW\b")),
+    ("copies", re.compile(r"^pg_restore: processing data for table ")),
+)
+COPY_TAG_RE = re.compile(r"^COPY (\d+)")
+ERROR_RE = re.compile(r"(?:^|: )(?:ERROR|FATAL|error):\s+(.*)")
+# pg_restore sale con 1 si hubo errores aunque completara la restauración
+PG_RESTORE_IGNORED_RE = re.compile(r"errors ignored on restore: \d+")
+PIPE_OUTPUT_TAIL = 5
+ERROR_CONTEXT_RE = re.compile(r"^(?:psql:\S+ )?(?:DETAIL|HINT|CONTEXT|LINE \d+):")
+MAX_ERRORS_SHOWN = 50
+
+
+class RestoreOutputSummary:
+    def __init__(self, db_name, output_box):
+        self.output_box = output_box
+        self.counters = {
+            "tables": 0,
+            "copies": 0,
+            "rows": 0,
+            "indexes": 0,
+            "constraints": 0,
+            "sequences": 0,
+            "functions": 0,
+            "views": 0,
+            "errors": 0,
+        }
+        self.last_error = None
+        self.lock = threading.Lock()
+        self.active = True
+
+        os.makedirs(RESTORE_LOG_DIR, exist_ok=True)
+        self.log_path = os.path.join(
+            RESTORE_LOG_DIR, f"{db_name}_{time.strftime('%Y-%m-%d_%H-%M-%S')}.log.gz"
+        )
+        self.log = gzip.open(self.log_path, "wt", compresslevel=3, errors="replace")
+
+        # Línea de resumen que se reescribe en su sitio; una marca por
+        # restauración porque varias pueden ir en paralelo
+        self.mark = f"restore_summary_{id(self)}"
+        output_box.insert(tk.END, "\n")
+        output_box.mark_set(self.mark, "end-2c")
+        output_box.mark_gravity(self.mark, tk.LEFT)
+        output_box.insert(tk.END, "\n")
+        self.refresh()
+
+    def feed(self, line):
+        self.log.write(line)
+        line = line.rstrip("\n")
+        with self.lock:
+            match = COPY_TAG_RE.match(line)
+            if match:
+                self.counters["copies"] += 1
+                self.counters["rows"] += int(match.group(1))
+                return
+            for counter, pattern in RESTORE_OUTPUT_PATTERNS:
+                if pattern.match(line):
+                    self.counters[counter] += 1
+                    return
+            match = ERROR_RE.search(line)
+            if match:
+                self.counters["errors"] += 1
+                self.last_error = self.counters["errors"] <= MAX_ERRORS_SHOWN
+                if self.last_error:
+                    self.output_box.insert(tk.END, f"❌ {match.group(1)}\n")
+                return
+            if self.last_error and ERROR_CONTEXT_RE.match(line):
+                self.output_box.insert(tk.END, f"   {line.strip()}\n")
+                return
+            self.last_error = None
+
+    def text(self):
+        c = self.counters
+        return (
+            f"📊 {c['tables']} tablas, {c['rows']:,} filas en {c['copies']} COPY, "
+            f"{c['indexes']} índices, {c['constraints']} ALTER TABLE, "
+            f"{c['sequences']} secuencias, {c['errors']} errores"
+        )
+
+    def refresh(self):
+        if self.mark not in self.output_box.mark_names():
+            return
+        self.output_box.delete(self.mark, f"{self.mark} lineend")
+        self.output_box.insert(self.mark, self.text())
+        if self.active:
+            root.after(500, self.refresh)
+        else:
+            self.output_box.mark_unset(self.mark)
+
+    def close(self):
+        self.active = False
+        self.log.close()
+        root.after(0, self.refresh)
+        shown = min(self.counters["errors"], MAX_ERRORS_SHOWN)
+        if self.counters["errors"] > shown:
+            self.output_box.insert(
+                tk.END,
+                f"⚠️ {self.counters['errors'] - shown} errores más en el log\n",
+            )
+        self.output_box.insert(tk.END, f"🗒️ Salida completa: {self.log_path}\n")
+
+
+def pipe_into_vm(command, source, summary, accepted_output=None):
+    # Enviar source al stdin de un comando en la VM y resumir su salida; un
+    # código de salida distinto de 0 es un error salvo que las últimas líneas
+    # coincidan con accepted_output (errores ya contados en el resumen)
+    process = subprocess.Popen(
+        ["vagrant", "ssh", "--no-tty", "-c", command],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+    tail = collections.deque(maxlen=PIPE_OUTPUT_TAIL)
+
+    def read_output():
+        for line in process.stdout:
+            line = line.decode(errors="replace")
+            tail.append(line.strip())
+            summary.feed(line)
+
+    reader = threading.Thread(target=read_output, daemon=True)
+    reader.start()
+    size = None
+    try:
+        size = copy_stream_threaded(source, process.stdin)
+    except BrokenPipeError:
+        # El comando terminó antes de leerlo todo: su salida dice por qué
+        pass
+    finally:
+        try:
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+    process.wait()
+    reader.join()
+
+    if process.returncode != 0 and not (
+        accepted_output is not None
+        and any(accepted_output.search(line) for line in tail)
+    ):
+        raise Exception(
+            f"El comando en la VM terminó con código {process.returncode}: "
+            + " | ".join(line for line in tail if line)
+        )
+    if size is None:
+        raise Exception(
+            "La VM cerró la entrada antes de terminar: "
+            + " | ".join(line for line in tail if line)
+        )
+    return size
+
+
+def restore_sql_stream(source, db_name, output_box, skip_tables=(), summary=None):
+    # psql lee el volcado por stdin: el SQL descomprimido nunca toca el disco
+    if skip_tables:
+
+        def on_block(table, offset, size, rows, skipped):
+            if skipped:
+                output_box.insert(
+                    tk.END, f"⏭️ Datos omitidos: {table} ({format_size(size)})\n"
+                )
+
+        source = FilteredDump(source, skip_tables, on_block)
+
+    own_summary = summary is None
+    if own_summary:
+        summary = RestoreOutputSummary(db_name, output_box)
+    try:
+        return pipe_into_vm(
+            f"docker exec -i {LDB_CONTAINER} psql -U {LDB_USER} -X "
+            f"-d {shlex.quote(db_name)}",
+            source,
+            summary,
+        )
+    finally:
+        if own_summary:
+            summary.close()
+
+
+def restore_dump_stream(source, db_name, output_box, summary=None):
+    # Formato custom leído desde stdin (pg_restore -j necesita un fichero)
+    own_summary = summary is None
+    if own_summary:
+        summary = RestoreOutputSummary(db_name, output_box)
+    try:
+        return pipe_into_vm(
+            f"docker exec -i {LDB_CONTAINER} pg_restore -U {LDB_USER} -v "
+            f"--no-owner -d {shlex.quote(db_name)}",
+            source,
+            summary,
+            accepted_output=PG_RESTORE_IGNORED_RE,
+        )
+    finally:
+        if own_summary:
+            summary.close()
+
+
+class VmFilestoreWriter:
+    # tar -x en la VM alimentado por un tar generado al vuelo; su stderr va a
+    # un temporal (sin riesgo de bloquear la tubería) para mostrarlo si falla
+    def __init__(self, db_name):
+        target = shlex.quote(vm_filestore_path(db_name))
+        self.errors = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(
+            [
+                "vagrant",
+                "ssh",
+                "--no-tty",
+                "-c",
+                f"sudo rm -rf {target} && sudo mkdir -p {target} && "
+                f"sudo tar -x --no-same-owner -C {target} -f - && "
+                f"sudo chown -R --reference=$(dirname {target}) {target}",
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=self.errors,
+        )
+        self.tar = tarfile.open(fileobj=self.process.stdin, mode="w|")
+
+    def addfile(self, entry, fileobj=None):
+        try:
+            self.tar.addfile(entry, fileobj)
+        except BrokenPipeError:
+            # tar terminó en la VM: close() da su error
+            self.close()
+            raise
+
+    def close(self):
+        try:
+            self.tar.close()
+        except BrokenPipeError:
+            pass
+        try:
+            self.process.stdin.close()
+        except BrokenPipeError:
+            pass
+        self._wait()
+
+    def abort(self):
+        # La restauración falló por otro motivo: no esperar a que tar acabe
+        try:
+            self.process.stdin.close()
+        except BrokenPipeError:
+            pass
+        self.process.kill()
+        self.process.wait()
+        self.errors.close()
+
+    def _wait(self):
+        self.process.wait()
+        self.errors.seek(0)
+        message = self.errors.read().decode(errors="replace").strip()
+        self.errors.close()
+        if self.process.returncode != 0:
+            raise Exception(
+                f"tar falló al descomprimir el filestore en la VM "
+                f"(código {self.process.returncode}): {message}"
+            )
+
+
+# Restauración rápida: perfil de carga masiva para la instancia local ldb
+BULK_LOAD_SETTINGS = {
+    "synchronous_commit": "off",
+    "maintenance_work_mem": "1GB",
+    "max_wal_size": "8GB",
+    "checkpoint_timeout": "30min",
+    "autovacuum": "off",
+}
+# Solo aceptable porque ldb es desechable; se vuelve a activar al terminar
+UNSAFE_BULK_LOAD_SETTINGS = {"fsync": "off", "full_page_writes": "off"}
+RESTORE_STATS_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "lgd-helper", "restore-times.json"
+)
+
+
+def apply_bulk_load_profile(disable_fsync=False):
+    settings = dict(BULK_LOAD_SETTINGS)
+    if disable_fsync:
+        settings.update(UNSAFE_BULK_LOAD_SETTINGS)
+
+    # Guardar lo que ya hubiera en postgresql.auto.conf para dejarlo igual
+    previous = {
+        name: setting
+        for name, setting in run_sql(
+            "SELECT name, setting || coalesce(unit, '') FROM pg_settings "
+            f"WHERE name IN ({', '.join(repr(name) for name in settings)}) "
+            "AND sourcefile LIKE '%postgresql.auto.conf'"
+        )
+    }
+    previous = {name: previous.get(name) for name in settings}
+    try:
+        for name, value in settings.items():
+            run_sql(f"ALTER SYSTEM SET {name} = '{value}'", autocommit=True)
+        run_sql("SELECT pg_reload_conf()")
+    except BaseException:
+        # No dejar a medias (quizá ya con fsync=off) lo que sí se aplicó
+        reset_bulk_load_profile(previous)
+        raise
+    return previous
+
+
+def reset_bulk_load_profile(previous):
+    for name, value in previous.items():
+        if value is None:
+            run_sql(f"ALTER SYSTEM RESET {name}", autocommit=True)
+        else:
+            run_sql(f"ALTER SYSTEM SET {name} = '{value}'", autocommit=True)
+    run_sql("SELECT pg_reload_conf()")
+    # Con fsync desactivado los datos pueden no estar en disco todavía
+    run_sql("CHECKPOINT", autocommit=True)
+
+
+def analyze_database(db_name):
+    code, output = run_in_vm(
+        f"docker exec {LDB_CONTAINER} vacuumdb -U {LDB_USER} --analyze-only "
+        f"-j {RESTORE_JOBS} -d {shlex.quote(db_name)}"
+    )
+    if code != 0:
+        raise Exception(f"ANALYZE falló: {output.strip()}")
+
+
+def load_restore_stats():
+    try:
+        with open(RESTORE_STATS_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def record_restore_time(backup_file, fast_mode, seconds, skip_tables=()):
+    stats = load_restore_stats()
+    stats.append(
+        {
+            "file": os.path.basename(backup_file),
+            "size": os.path.getsize(backup_file),
+            "fast": fast_mode,
+            "skip": sorted(skip_tables),
+            "seconds": round(seconds, 1),
+            "date": time.strftime("%Y-%m-%d %H:%M"),
+        }
+    )
+    os.makedirs(os.path.dirname(RESTORE_STATS_PATH), exist_ok=True)
+    with open(RESTORE_STATS_PATH, "w") as f:
+        json.dump(stats[-200:], f, indent=2)
+
+
+def restore_baseline(backup_file, skip_tables=()):
+    # Última restauración normal del mismo archivo o, si no hay, estimación
+    # según la velocidad media (bytes/s) de las restauraciones normales. Solo
+    # cuentan las que omitieron las mismas tablas: una selectiva no es base
+    # de una completa ni al revés
+    size = os.path.getsize(backup_file)
+    name = os.path.basename(backup_file)
+    skip = sorted(skip_tables)
+    normal = [
+        s
+        for s in load_restore_stats()
+        if not s["fast"] and s["seconds"] > 0 and s.get("skip", []) == skip
+    ]
+    for entry in reversed(normal):
+        if entry["file"] == name and entry["size"] == size:
+            return entry["seconds"], "misma copia"
+    if normal:
+        rate = sum(s["size"] for s in normal) / sum(s["seconds"] for s in normal)
+        return size / rate, "estimado"
+    return None, None
+
+
+FILESTORE_WORKERS = int(os.getenv("LGD_FILESTORE_WORKERS", str(os.cpu_count() or 4)))
+# Adjuntos mayores se envían en streaming en lugar de descomprimirse en memoria
+FILESTORE_INLINE_LIMIT = 32 * 1024 * 1024
+
+
+def stream_zip_filestore(backup_file, db_name, output_box):
+    # Los miembros filestore/ del ZIP se descomprimen en un pool de hilos (zlib
+    # libera el GIL) y se envían en orden como un único tar por SSH
+    with zipfile.ZipFile(backup_file, "r") as zip_ref:
+        members = [
+            info
+            for info in zip_ref.infolist()
+            if info.filename.startswith("filestore/")
+            and not info.is_dir()
+            and len(info.filename) > len("filestore/")
+        ]
+        if not members:
+            output_box.insert(
+                tk.END, "⚠️ No se encontró carpeta filestore en el backup\n"
+            )
+            return
+
+        output_box.insert(
+            tk.END,
+            f"📁 Enviando filestore ({len(members)} ficheros, "
+            f"{format_size(sum(m.file_size for m in members))})...\n",
+        )
+        start = time.time()
+
+        def read_member(info):
+            if info.file_size > FILESTORE_INLINE_LIMIT:
+                return None
+            with zip_ref.open(info) as source:
+                return source.read()
+
+        writer = VmFilestoreWriter(db_name)
+        try:
+            with concurrent.futures.ThreadPoolExecutor(FILESTORE_WORKERS) as pool:
+                pending = collections.deque()
+                members_iter = iter(members)
+                window = FILESTORE_WORKERS * 4
+
+                def fill_window():
+                    for info in members_iter:
+                        pending.append((info, pool.submit(read_member, info)))
+                        if len(pending) >= window:
+                            break
+
+                fill_window()
+                while pending:
+                    info, future = pending.popleft()
+                    data = future.result()
+                    entry = tarfile.TarInfo(info.filename[len("filestore/") :])
+                    entry.size = info.file_size
+                    entry.mtime = time.mktime(info.date_time + (0, 0, -1))
+                    entry.mode = 0o644
+                    if data is None:
+                        with zip_ref.open(info) as source:
+                            writer.addfile(entry, source)
+                    else:
+                        writer.addfile(entry, io.BytesIO(data))
+                    fill_window()
+        except BaseException:
+            writer.abort()
+            raise
+        writer.close()
+
+    output_box.insert(
+        tk.END,
+        f"✅ Filestore actualizado correctamente en {time.time() - start:.1f} s\n",
+    )
+
+
+def restore_streamed_backup(
+    backup_file, backup_format, codec, db_name, output_box, skip_tables=(), summary=None
+):
+    stream, process = open_decompressed(backup_file, codec)
+    try:
+        if backup_format == "sql":
+            size = restore_sql_stream(stream, db_name, output_box, skip_tables, summary)
+            output_box.insert(tk.END, f"📥 {format_size(size)} de SQL restaurados\n")
+            output_box.insert(tk.END, "⚠️ El respaldo no incluye filestore\n")
+            return
+        if backup_format == "dump":
+            restore_dump_stream(stream, db_name, output_box, summary)
+            output_box.insert(tk.END, "⚠️ El respaldo no incluye filestore\n")
+            return
+
+        # tar (.tar, .tar.gz, .tar.zst): un solo recorrido secuencial
+        dump_found = False
+        files = 0
+        writer = None
+        try:
+            with tarfile.open(fileobj=stream, mode="r|") as tar:
+                for entry in tar:
+                    name = os.path.normpath(entry.name)
+                    if name in ("dump.sql", "dump.dump") and entry.isfile():
+                        dump_found = True
+                        source = tar.extractfile(entry)
+                        if name == "dump.sql":
+                            size = restore_sql_stream(
+                                source, db_name, output_box, skip_tables, summary
+                            )
+                            output_box.insert(
+                                tk.END, f"📥 {format_size(size)} de SQL restaurados\n"
+                            )
+                        else:
+                            restore_dump_stream(source, db_name, output_box, summary)
+                    elif name.startswith("filestore/"):
+                        if writer is None:
+                            output_box.insert(tk.END, "📁 Enviando filestore...\n")
+                            writer = VmFilestoreWriter(db_name)
+                        entry.name = name[len("filestore/") :]
+                        writer.addfile(
+                            entry, tar.extractfile(entry) if entry.isfile() else None
+                        )
+                        files += entry.isfile()
+        except BaseException:
+            if writer is not None:
+                writer.abort()
+            raise
+
+        if writer is not None:
+            writer.close()
+            output_box.insert(
+                tk.END, f"✅ Filestore actualizado correctamente ({files} ficheros)\n"
+            )
+        else:
+            output_box.insert(
+                tk.END, "⚠️ No se encontró carpeta filestore en el backup\n"
+            )
+        if not dump_found:
+            raise Exception("No se encontró el archivo dump.sql en el respaldo")
+    finally:
+        close_decompressed(stream, process)
+
+
+def manage_checkpoints(output_box):
+    output_box.begin_section()
+    output_box.insert(tk.END, "📸 Checkpoints de base de datos...\n\n")
+
+    def show_checkpoints(project_name):
+        db_name = project_db_name(project_name)
+
+        selector = tk.Toplevel(root)
+        selector.title(f"Checkpoints - {db_name}")
+        selector.geometry("600x400")
+        selector.configure(bg="#1e1e1e")
+
+        listbox = tk.Listbox(
+            selector,
+            bg="#333",
+            fg="#00FF00",
+            font=("Consolas", 12),
+            selectmode=tk.SINGLE,
+        )
+        listbox.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        name_entry = tk.Entry(
+            selector,
+            bg="#333",
+            fg="#00FF00",
+            insertbackground="#00FF00",
+            font=("Consolas", 12),
+        )
+        name_entry.pack(fill=tk.X, padx=10)
+
+        names = []
+
+        def refresh():
+            def task():
+                try:
+                    checkpoints = list_checkpoints(db_name)
+                except Exception as e:
+                    output_box.insert(
+                        tk.END, f"❌ Error al listar checkpoints: {str(e)}\n"
+                    )
+                    return
+
+                def fill():
+                    listbox.delete(0, tk.END)
+                    names.clear()
+                    for name, info in sorted(checkpoints.items()):
+                        names.append(name)
+                        listbox.insert(
+                            tk.END,
+                            f"{name}  (BD {info['db_size_pretty']}, "
+                            f"filestore {format_size(info['filestore_size'])})",
+                        )
+
+                root.after(0, fill)
+
+            threading.Thread(target=task).start()
+
+        def selected_name():
+            if listbox.curselection():
+                return names[listbox.curselection()[0]]
+            return None
+
+        def run(action, label, heavy=True):
+            def task():
+                start = time.time()
+                try:
+                    action()
+                    output_box.insert(
+                        tk.END,
+                        f"✅ {label} en {time.time() - start:.1f} s\n",
+                    )
+                except Exception as e:
+                    output_box.insert(tk.END, f"❌ Error: {str(e)}\n")
+                    raise
+                finally:
+                    output_box.see(tk.END)
+                    refresh()
+
+            submit_job(label, [project_lock(db_name)], task, output_box, heavy)
+
+        def on_create():
+            checkpoint = name_entry.get().strip() or time.strftime("%Y%m%d-%H%M%S")
+            if not CHECKPOINT_NAME_RE.match(checkpoint):
+                output_box.insert(
+                    tk.END, "⚠️ Nombre inválido (letras, números, '-' y '_')\n"
+                )
+                return
+            if not db_name_fits(checkpoint_db_name(db_name, checkpoint)):
+                limit = PG_NAME_LIMIT - len(checkpoint_db_name(db_name, "").encode())
+                output_box.insert(
+                    tk.END,
+                    f"⚠️ Nombre demasiado largo para este proyecto "
+                    f"(máximo {max(limit, 0)} caracteres)\n",
+                )
+                return
+            run(
+                lambda: create_checkpoint(db_name, checkpoint, output_box),
+                f"Checkpoint '{checkpoint}' creado",
+            )
+
+        def on_rollback():
+            checkpoint = selected_name()
+            if checkpoint:
+                run(
+                    lambda: rollback_checkpoint(db_name, checkpoint, output_box),
+                    f"Rollback a '{checkpoint}' completado",
+                )
+
+        def on_delete():
+            checkpoint = selected_name()
+            if checkpoint:
+                run(
+                    lambda: delete_checkpoint(db_name, checkpoint),
+                    f"Checkpoint '{checkpoint}' eliminado",
+                    heavy=False,
+                )
+
+        buttons = tk.Frame(selector, bg="#1e1e1e")
+        buttons.pack(pady=10)
+        for text, command in (
+            ("📸 Crear", on_create),
+            ("⏪ Rollback", on_rollback),
+            ("🗑️ Eliminar", on_delete),
+        ):
+            tk.Button(
+                buttons,
+                text=text,
                 font=("Consolas", 12),
                 bg="#333",
                 fg="#00FF00",
-                command=on_delete,
-            )
-            delete_btn.pack(pady=10)
+                command=command,
+            ).pack(side=tk.LEFT, padx=5)
 
-        except Exception as e:
-            output_box.insert(
-                tk.END, f"\n❌ Error al listar las bases de datos: {str(e)}\n"
-            )
+        refresh()
 
-    threading.Thread(target=task).start()
+    select_project_dialog("Seleccionar Proyecto", show_checkpoints)
 
 
-def delete_selected_database(db_name, output_box):
-    output_box.delete(1.0, tk.END)
-    output_box.insert(tk.END, f"🗑️ Eliminando base de datos '{db_name}'...\n\n")
+# Pruebas en paralelo: N clones de la BD del proyecto (CREATE DATABASE ...
+# TEMPLATE) y un contenedor Odoo efímero por clon con --test-enable
+TEST_RUNS_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "lgd-helper", "test-runs"
+)
+TEST_TIMES_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "lgd-helper", "test-times.json"
+)
+TEST_RUN_TIMEOUT = 2 * 60 * 60
+TEST_WORKERS = int(os.getenv("LGD_TEST_WORKERS", "4"))
+TEST_RESULT_RE = re.compile(r"(\d+) failed, (\d+) error\(s\) of (\d+) tests")
+TEST_RAN_RE = re.compile(r"Ran (\d+) tests? in")
+TEST_FAILURE_RE = re.compile(r"\b(FAIL|ERROR): ")
 
-    def task():
-        try:
-            # Primero detenemos el contenedor que usa la base de datos
-            output_box.insert(tk.END, f"🛑 Deteniendo contenedor '{db_name}'...\n")
-            stop_command = f"cd ../../;vagrant ssh -c 'docker stop {db_name}'"
-            output_box.insert(tk.END, f"Ejecutando: {stop_command}\n")
 
-            process = subprocess.Popen(
-                stop_command,
-                shell=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
+def test_clone_name(db_name, index):
+    return f"{db_name}-test-{index}"
+
+
+def test_clone_filestore_path(db_name, clone):
+    # El contenedor monta /opt/odoo/staging/<bd> como data_dir, así que el
+    # filestore del clon tiene que quedar junto al del proyecto
+    return f"/opt/odoo/staging/{db_name}/filestore/{clone}"
+
+
+def load_test_times():
+    try:
+        with open(TEST_TIMES_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def record_test_times(db_name, workers):
+    # Segundos estimados por módulo/etiqueta: el tiempo del contenedor
+    # repartido entre las unidades que ejecutó
+    times = load_test_times()
+    estimates = times.setdefault(db_name, {})
+    for worker in workers:
+        if worker["units"] and worker["code"] == 0:
+            share = worker["seconds"] / len(worker["units"])
+            for unit in worker["units"]:
+                estimates[unit] = round(share, 1)
+    os.makedirs(os.path.dirname(TEST_TIMES_PATH), exist_ok=True)
+    with open(TEST_TIMES_PATH, "w") as f:
+        json.dump(times, f, indent=2)
+
+
+def split_test_units(units, count, estimates):
+    # Reparto voraz: la unidad más larga al contenedor menos cargado
+    default = sum(estimates.values()) / len(estimates) if estimates else 1
+    groups = [[] for _ in range(min(count, len(units)))]
+    loads = [0.0] * len(groups)
+    for unit in sorted(units, key=lambda u: -estimates.get(u, default)):
+        target = loads.index(min(loads))
+        groups[target].append(unit)
+        loads[target] += estimates.get(unit, default)
+    return groups
+
+
+def inspect_odoo_container(container_name):
+    code, output = run_in_vm(
+        f"docker inspect {shlex.quote(container_name)}", timeout=120
+    )
+    if code != 0:
+        raise Exception(f"No se encontró el contenedor {container_name}")
+    info = json.loads(output[output.index("[") :])[0]
+    return {
+        "image": info["Config"]["Image"],
+        "env": info["Config"].get("Env") or [],
+        "cmd": info["Config"].get("Cmd") or ["odoo"],
+        "network": info["HostConfig"].get("NetworkMode") or "default",
+    }
+
+
+def test_container_command(db_name, clone, container, modules, tags):
+    # Mismo contenedor que el del proyecto (imagen, volúmenes, red y entorno),
+    # con los argumentos de prueba al final para que prevalezcan
+    args = ["docker", "run", "--rm", "--name", clone, "--volumes-from", db_name]
+    if container["network"] != "default":
+        args += ["--network", container["network"]]
+    for variable in container["env"]:
+        args += ["-e", variable]
+    args.append(container["image"])
+    args += container["cmd"]
+    args += [
+        "-d",
+        clone,
+        f"--db-filter=^{re.escape(clone)}$",
+        "--test-enable",
+        "--stop-after-init",
+        "--workers=0",
+        "--max-cron-threads=0",
+        "-u",
+        ",".join(modules),
+        "--test-tags",
+        ",".join(tags),
+    ]
+    return " ".join(shlex.quote(arg) for arg in args)
+
+
+def prepare_test_clones(db_name, count, output_box):
+    was_running = container_is_running(db_name)
+    if was_running:
+        # La plantilla no puede tener conexiones durante la copia
+        output_box.insert(tk.END, f"🛑 Deteniendo {db_name} para clonar...\n")
+        run_in_vm(f"docker stop {shlex.quote(db_name)}")
+    try:
+        for index in range(count):
+            clone = test_clone_name(db_name, index)
+            output_box.insert(tk.END, f"🧬 Clonando '{db_name}' en '{clone}'...\n")
+            drop_database(clone)
+            create_database(clone, template=db_name)
+            target = test_clone_filestore_path(db_name, clone)
+            source = vm_filestore_path(db_name)
+            code, output = run_in_vm(
+                f"sudo rm -rf {shlex.quote(target)} && "
+                f"if sudo test -d {shlex.quote(source)}; then "
+                f"{copy_tree_in_vm(source, target)}; "
+                f"else sudo mkdir -p {shlex.quote(target)}; fi"
             )
+            if code != 0:
+                raise Exception(f"No se pudo copiar el filestore: {output.strip()}")
+    finally:
+        if was_running:
+            output_box.insert(tk.END, f"🚀 Iniciando de nuevo {db_name}...\n")
+            run_in_vm(f"docker start {shlex.quote(db_name)}")
+
+
+def cleanup_test_clones(db_name, count):
+    for index in range(count):
+        clone = test_clone_name(db_name, index)
+        run_in_vm(
+            f"docker rm -f {shlex.quote(clone)} >/dev/null 2>&1; "
+            f"sudo rm -rf {shlex.quote(test_clone_filestore_path(db_name, clone))}"
+        )
+        drop_database(clone)
+
+
+async def run_test_container(command, worker, log_path, output_box):
+    failures = worker["failures"]
+
+    with open(log_path, "w") as log:
+
+        def on_line(line):
+            log.write(line)
+            result = TEST_RESULT_RE.search(line)
+            if result:
+                worker["failed"] += int(result.group(1))
+                worker["errors"] += int(result.group(2))
+                worker["tests"] += int(result.group(3))
+            ran = TEST_RAN_RE.search(line)
+            if ran:
+                # Odoo < 16 no muestra el resumen final, solo "Ran N tests"
+                worker["ran"] += int(ran.group(1))
+            match = LOG_LINE_RE.match(line)
+            if (
+                match
+                and LOG_LEVELS[match.group(2)] >= LOG_LEVELS["ERROR"]
+                and TEST_FAILURE_RE.search(line)
+            ):
+                failures.append(line.rstrip())
+                append_output(output_box, f"   [{worker['index']}] {line}")
+
+        start = time.time()
+        try:
+            worker["code"] = await stream_command(
+                ["vagrant", "ssh", "-c", command], on_line, TEST_RUN_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            worker["code"] = -1
+            failures.append(f"Tiempo agotado tras {TEST_RUN_TIMEOUT} s")
+        worker["seconds"] = time.time() - start
+
+    status = "✅" if worker["code"] == 0 and not failures else "❌"
+    append_output(
+        output_box,
+        f"{status} Contenedor {worker['index']} terminó en "
+        f"{worker['seconds']:.0f} s ({', '.join(worker['units'])})\n",
+    )
 
-            for line in process.stdout:
-                output_box.insert(tk.END, line)
-                output_box.see(tk.END)
 
-            # Ahora sí eliminamos la base de datos
-            output_box.insert(tk.END, "🗑️ Eliminando base de datos anterior...\n")
-            drop_command = (
-                f"cd ../../;vagrant ssh -c 'docker exec ldb dropdb -U odoo --if-exists {db_name}'"
+def format_test_report(db_name, workers, wall_seconds):
+    tests = sum(w["tests"] or w["ran"] for w in workers)
+    failed = sum(w["failed"] for w in workers)
+    errors = sum(w["errors"] for w in workers)
+    busy = sum(w["seconds"] for w in workers)
+    lines = [
+        f"🧪 Informe de pruebas de {db_name}",
+        f"   {tests} pruebas, {failed} fallos, {errors} errores",
+        f"   {wall_seconds:.0f} s en total, {busy:.0f} s sumando contenedores "
+        f"(x{busy / wall_seconds if wall_seconds else 1:.1f})",
+        "",
+    ]
+    for worker in workers:
+        lines.append(
+            f"   [{worker['index']}] código {worker['code']}, "
+            f"{worker['seconds']:.0f} s: {', '.join(worker['units'])}"
+        )
+    failures = [f"   [{w['index']}] {line}" for w in workers for line in w["failures"]]
+    if failures:
+        lines += ["", "❌ Fallos:"] + failures
+    return "\n".join(lines) + "\n"
+
+
+def run_parallel_tests(db_name, modules, tags, count, output_box):
+    # Si hay varias etiquetas se reparten las etiquetas y cada contenedor
+    # actualiza todos los módulos; si no, se reparten los módulos
+    split_tags = len(tags) > 1
+    units = tags if split_tags else modules
+    groups = split_test_units(units, count, load_test_times().get(db_name, {}))
+    container = inspect_odoo_container(db_name)
+
+    run_dir = os.path.join(TEST_RUNS_DIR, f"{db_name}-{time.strftime('%Y%m%d-%H%M%S')}")
+    os.makedirs(run_dir, exist_ok=True)
+
+    workers = []
+    commands = []
+    for index, group in enumerate(groups):
+        if split_tags:
+            worker_modules, worker_tags = modules, group
+        else:
+            # Limitar las etiquetas a los módulos del grupo para que las
+            # pruebas post_install de otros módulos no se repitan en cada clon
+            worker_modules = group
+            worker_tags = list(
+                dict.fromkeys(
+                    tag if "/" in tag or ":" in tag else f"{tag}/{module}"
+                    for tag in tags or [""]
+                    for module in group
+                )
             )
-            output_box.insert(tk.END, f"Ejecutando: {drop_command}\n")
+        clone = test_clone_name(db_name, index)
+        commands.append(
+            test_container_command(
+                db_name, clone, container, worker_modules, worker_tags
+            )
+        )
+        workers.append(
+            {
+                "index": index,
+                "units": group,
+                "code": None,
+                "seconds": 0,
+                "tests": 0,
+                "ran": 0,
+                "failed": 0,
+                "errors": 0,
+                "failures": [],
+            }
+        )
 
-            process = subprocess.Popen(
-                drop_command,
-                shell=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
+    try:
+        prepare_test_clones(db_name, len(groups), output_box)
+        output_box.insert(
+            tk.END, f"\n🧪 Lanzando {len(groups)} contenedores de prueba...\n"
+        )
+
+        async def run_all():
+            await asyncio.gather(
+                *(
+                    run_test_container(
+                        command,
+                        worker,
+                        os.path.join(run_dir, f"worker-{worker['index']}.log"),
+                        output_box,
+                    )
+                    for command, worker in zip(commands, workers)
+                )
             )
-            for line in process.stdout:
-                output_box.insert(tk.END, line)
-                output_box.see(tk.END)
 
-            output_box.insert(
-                tk.END, f"\n✅ Base de datos '{db_name}' eliminada correctamente.\n"
+        start = time.time()
+        run_async(run_all()).result()
+        wall_seconds = time.time() - start
+    finally:
+        output_box.insert(tk.END, "🧹 Eliminando clones de prueba...\n")
+        cleanup_test_clones(db_name, len(groups))
+
+    report = format_test_report(db_name, workers, wall_seconds)
+    with open(os.path.join(run_dir, "report.txt"), "w") as f:
+        f.write(report)
+    record_test_times(db_name, workers)
+    output_box.insert(tk.END, f"\n{report}\n📄 Logs en {run_dir}\n")
+    output_box.see(tk.END)
+    return all(w["code"] == 0 and not w["failures"] for w in workers)
+
+
+def parallel_tests(output_box):
+    def on_project(project_name):
+        db_name = project_db_name(project_name)
+
+        dialog = tk.Toplevel(root)
+        dialog.title(f"Pruebas en paralelo - {db_name}")
+        dialog.geometry("500x300")
+        dialog.configure(bg="#1e1e1e")
+
+        def field(text, value):
+            tk.Label(
+                dialog, text=text, font=("Consolas", 12), bg="#1e1e1e", fg="#00FF00"
+            ).pack(pady=(5, 0))
+            widget = tk.Entry(
+                dialog,
+                bg="#333",
+                fg="#00FF00",
+                insertbackground="#00FF00",
+                font=("Consolas", 12),
             )
-        except Exception as e:
-            output_box.insert(
-                tk.END, f"\n❌ Error al eliminar la base de datos: {str(e)}\n"
+            widget.insert(0, value)
+            widget.pack(fill=tk.X, padx=10)
+            return widget
+
+        modules_entry = field("Módulos (separados por comas):", "")
+        tags_entry = field("Etiquetas de prueba (opcional):", "")
+        count_entry = field("Contenedores en paralelo:", str(TEST_WORKERS))
+
+        def start():
+            modules = [m.strip() for m in modules_entry.get().split(",") if m.strip()]
+            tags = [t.strip() for t in tags_entry.get().split(",") if t.strip()]
+            try:
+                count = max(1, int(count_entry.get()))
+            except ValueError:
+                count = 1
+            if not modules:
+                output_box.insert(tk.END, "⚠️ Indica al menos un módulo\n")
+                return
+            dialog.destroy()
+
+            output_box.begin_section()
+            output_box.insert(tk.END, f"🧪 Pruebas en paralelo de {db_name}...\n\n")
+
+            def task():
+                try:
+                    if not run_parallel_tests(
+                        db_name, modules, tags, count, output_box
+                    ):
+                        raise Exception("Hay pruebas fallidas")
+                except Exception as e:
+                    output_box.insert(tk.END, f"❌ {str(e)}\n")
+                    output_box.see(tk.END)
+                    raise
+
+            submit_job(
+                f"Pruebas {db_name}", [project_lock(db_name)], task, output_box, True
             )
 
-    threading.Thread(target=task).start()
+        tk.Button(
+            dialog,
+            text="🧪 Ejecutar",
+            font=("Consolas", 12),
+            bg="#333",
+            fg="#00FF00",
+            activebackground="#444",
+            command=start,
+        ).pack(pady=10)
+
+    select_project_dialog("Seleccionar Proyecto", on_project)
 
 
 def toggle_fullscreen():
@@ -479,7 +3826,7 @@ def toggle_fullscreen():
 
 
 def restore_database(output_box):
-    output_box.delete(1.0, tk.END)
+    output_box.begin_section()
     output_box.insert(tk.END, "🔄 Preparando restauración de base de datos...\n\n")
 
     def select_project():
@@ -572,7 +3919,7 @@ def restore_database(output_box):
         path = os.path.expanduser("~")
         files = []
         for f in os.listdir(path):
-            if f.endswith(".zip"):
+            if f.endswith(BACKUP_EXTENSIONS):
                 full_path = os.path.join(path, f)
                 files.append((full_path, os.path.getmtime(full_path)))
 
@@ -595,7 +3942,7 @@ def restore_database(output_box):
                 # El path completo está en el siguiente índice
                 selected_file = listbox.get(idx + 1)
                 selector.destroy()
-                process_backup_file(selected_file, project_name)
+                select_restore_options(selected_file, project_name)
 
         select_btn = tk.Button(
             selector,
@@ -607,160 +3954,290 @@ def restore_database(output_box):
         )
         select_btn.pack(pady=10)
 
-    def process_backup_file(backup_file, project_name):
-        def task():
-            try:
-                # Preparar directorio temporal en la carpeta dev local
-                output_box.insert(tk.END, "📁 Preparando archivos...\n")
-                local_temp = os.path.join(os.getcwd(), "dev", "temp")
-                os.makedirs(local_temp, exist_ok=True)
-
-                # Copiar el ZIP a la carpeta dev/temp
-                output_box.insert(tk.END, "📤 Copiando archivo ZIP...\n")
-                shutil.copy2(backup_file, os.path.join(local_temp, "backup.zip"))
-
-                # Extraer el ZIP localmente
-                output_box.insert(tk.END, "📦 Extrayendo archivo ZIP...\n")
-                with zipfile.ZipFile(
-                    os.path.join(local_temp, "backup.zip"), "r"
-                ) as zip_ref:
-                    zip_ref.extractall(local_temp)
-
-                # Verificar que el dump.sql existe
-                dump_path = os.path.join(local_temp, "dump.sql")
-                if not os.path.exists(dump_path):
-                    raise Exception("No se encontró el archivo dump.sql en el ZIP")
-
-                # Construir el nombre de la base de datos
-                user_dev = os.getenv("USERDEV", "controlcdms-gh")
-                db_name = f"{project_name}-local-{user_dev}"
+    def select_restore_options(backup_file, project_name):
+        config = load_config()
+        skip_tables = set(config.get("restoreSkipTables", DEFAULT_SKIP_TABLES))
 
-                # Detener el contenedor si existe
-                output_box.insert(tk.END, f"🛑 Deteniendo contenedor '{db_name}'...\n")
-                stop_command = f"cd ../../;vagrant ssh -c 'docker stop {db_name}'"
-                subprocess.run(stop_command, shell=True)
+        selector = tk.Toplevel(root)
+        selector.title("Opciones de Restauración")
+        selector.geometry("600x500")
+        selector.configure(bg="#1e1e1e")
 
-                # Eliminar base de datos si existe
-                output_box.insert(tk.END, "🗑️ Eliminando base de datos anterior...\n")
-                drop_command = f"cd ../../;vagrant ssh -c 'docker exec ldb dropdb -U odoo --if-exists {db_name}'"
-                output_box.insert(tk.END, f"Ejecutando: {drop_command}\n")
-                process = subprocess.Popen(
-                    drop_command,
-                    shell=True,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    text=True,
-                )
-                for line in process.stdout:
-                    output_box.insert(tk.END, line)
-                    output_box.see(tk.END)
+        selective = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            selector,
+            text="Restauración selectiva (omitir datos de las tablas marcadas)",
+            variable=selective,
+            font=("Consolas", 12),
+            bg="#1e1e1e",
+            fg="#00FF00",
+            selectcolor="#333",
+            activebackground="#1e1e1e",
+        ).pack(pady=5)
 
-                # Crear nueva base de datos
-                output_box.insert(tk.END, "🆕 Creando nueva base de datos...\n")
-                create_command = (
-                    f"cd ../../;vagrant ssh -c 'docker exec ldb createdb -U odoo {db_name}'"
-                )
-                output_box.insert(tk.END, f"Ejecutando: {create_command}\n")
-                process = subprocess.Popen(
-                    create_command,
-                    shell=True,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    text=True,
-                )
-                for line in process.stdout:
-                    output_box.insert(tk.END, line)
-                    output_box.see(tk.END)
+        fast_mode = tk.BooleanVar(value=config.get("restoreFastMode", False))
+        disable_fsync = tk.BooleanVar(value=False)
+        for text, variable in (
+            ("⚡ Restauración rápida (perfil de carga masiva)", fast_mode),
+            ("Desactivar fsync durante la restauración", disable_fsync),
+        ):
+            tk.Checkbutton(
+                selector,
+                text=text,
+                variable=variable,
+                font=("Consolas", 12),
+                bg="#1e1e1e",
+                fg="#00FF00",
+                selectcolor="#333",
+                activebackground="#1e1e1e",
+            ).pack(anchor="w", padx=10)
+
+        frame = tk.Frame(selector, bg="#1e1e1e")
+        frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
 
-                # Restaurar datos usando el archivo en /home/vagrant/dev/temp/dump.sql
-                output_box.insert(tk.END, "📥 Restaurando datos...\n")
+        listbox = tk.Listbox(
+            frame,
+            bg="#333",
+            fg="#00FF00",
+            font=("Consolas", 11),
+            selectmode=tk.MULTIPLE,
+            exportselection=False,
+        )
+        scrollbar = tk.Scrollbar(frame, orient="vertical", command=listbox.yview)
+        listbox.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
-                # Primero copiamos el dump al contenedor
-                copy_to_container = f"cd ../../;vagrant ssh -c 'docker cp /home/vagrant/dev/temp/dump.sql ldb:/tmp/dump.sql'"
+        tables = []
+
+        def fill(rows):
+            listbox.delete(0, tk.END)
+            tables.clear()
+            for row in rows:
+                tables.append(row["table"])
+                if "size" in row:
+                    label = (
+                        f"{row['table']:<40} {format_size(row['size']):>10} "
+                        f"{row['rows']:>12,} filas"
+                    )
+                else:
+                    label = row["table"]
+                listbox.insert(tk.END, label)
+                if row["table"] in skip_tables:
+                    listbox.selection_set(tk.END)
+
+        fill([{"table": table} for table in sorted(skip_tables)])
+
+        def on_analyze():
+            output_box.insert(tk.END, "📊 Analizando tablas del volcado...\n")
+
+            def task():
+                start = time.time()
+                try:
+                    index = build_dump_index(backup_file)
+                except Exception as e:
+                    output_box.insert(tk.END, f"❌ Error al analizar: {str(e)}\n")
+                    raise
                 output_box.insert(
-                    tk.END, f"Copiando dump al contenedor: {copy_to_container}\n"
-                )
-                process = subprocess.Popen(
-                    copy_to_container,
-                    shell=True,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    text=True,
+                    tk.END,
+                    f"✅ {len(index)} tablas analizadas en "
+                    f"{time.time() - start:.1f} s\n",
                 )
-                for line in process.stdout:
-                    output_box.insert(tk.END, line)
-                    output_box.see(tk.END)
+                root.after(0, lambda: fill(index))
+
+            submit_job(
+                f"Analizar {os.path.basename(backup_file)}",
+                [],
+                task,
+                output_box,
+                heavy=True,
+            )
 
-                # Ahora restauramos usando la ruta dentro del contenedor
-                restore_command = (
-                    f"cd ../../;vagrant ssh -c 'docker exec ldb "
-                    f"psql -U odoo -f /tmp/dump.sql {db_name}'"
-                )
-                output_box.insert(tk.END, f"Ejecutando: {restore_command}\n")
-                process = subprocess.Popen(
-                    restore_command,
-                    shell=True,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    text=True,
+        def on_restore():
+            chosen = [tables[i] for i in listbox.curselection()]
+            use_selective = selective.get()
+            use_fast = fast_mode.get()
+            use_no_fsync = use_fast and disable_fsync.get()
+            selector.destroy()
+            if use_selective:
+                config["restoreSkipTables"] = chosen
+            config["restoreFastMode"] = use_fast
+            save_config(config)
+            process_backup_file(
+                backup_file,
+                project_name,
+                chosen if use_selective else (),
+                use_fast,
+                use_no_fsync,
+            )
+
+        buttons = tk.Frame(selector, bg="#1e1e1e")
+        buttons.pack(pady=10)
+        for text, command in (
+            ("📊 Analizar tablas", on_analyze),
+            ("📥 Restaurar", on_restore),
+        ):
+            tk.Button(
+                buttons,
+                text=text,
+                font=("Consolas", 12),
+                bg="#333",
+                fg="#00FF00",
+                command=command,
+            ).pack(side=tk.LEFT, padx=5)
+
+    def process_backup_file(
+        backup_file, project_name, skip_tables=(), fast_mode=False, disable_fsync=False
+    ):
+        db_name = project_db_name(project_name)
+
+        def task():
+            try:
+                # Detectar el formato por la cabecera del archivo
+                backup_format, codec = detect_backup_format(backup_file)
+                output_box.insert(
+                    tk.END,
+                    f"🔎 Formato del respaldo: {backup_format}"
+                    f"{' + ' + codec if codec else ''}\n",
                 )
-                for line in process.stdout:
-                    output_box.insert(tk.END, line)
-                    output_box.see(tk.END)
 
-                # Después de restaurar la base de datos, actualizamos el filestore
-                output_box.insert(tk.END, "📁 Actualizando filestore...\n")
+                if backup_format == "zip":
+                    # Preparar directorio temporal en la carpeta dev local
+                    output_box.insert(tk.END, "📁 Preparando archivos...\n")
+                    # Carpeta propia por proyecto: restauraciones en paralelo
+                    local_temp = os.path.join(os.getcwd(), "dev", "temp", db_name)
+                    os.makedirs(local_temp, exist_ok=True)
+
+                    # Solo dump.dump se extrae; dump.sql y el filestore se leen
+                    # del ZIP en streaming
+                    with zipfile.ZipFile(backup_file, "r") as zip_ref:
+                        names = zip_ref.namelist()
+                        if "dump.dump" in names:
+                            output_box.insert(tk.END, "📦 Extrayendo dump.dump...\n")
+                            zip_ref.extract("dump.dump", local_temp)
+
+                    # Verificar que el dump.sql (o dump.dump en formato custom) existe
+                    dump_file = "dump.sql"
+                    if "dump.dump" in names:
+                        dump_file = "dump.dump"
+                    if dump_file not in names:
+                        raise Exception("No se encontró el archivo dump.sql en el ZIP")
+                    if skip_tables and dump_file == "dump.dump":
+                        output_box.insert(
+                            tk.END,
+                            "⚠️ La restauración selectiva solo aplica a dump.sql\n",
+                        )
 
-                # Verificar que existe el filestore en el ZIP extraído
-                local_filestore = os.path.join(local_temp, "filestore")
-                if not os.path.exists(local_filestore):
-                    output_box.insert(
-                        tk.END, "⚠️ No se encontró carpeta filestore en el backup\n"
-                    )
-                else:
-                    # Definir la ruta del filestore en la máquina virtual
-                    vm_filestore_path = (
-                        f"/opt/odoo/staging/{db_name}/filestore/{db_name}"
-                    )
+                # Detener el contenedor si existe
+                output_box.insert(tk.END, f"🛑 Deteniendo contenedor '{db_name}'...\n")
+                stop_command = f"cd ../../;vagrant ssh -c 'docker stop {db_name}'"
+                subprocess.run(stop_command, shell=True)
 
-                    # Primero eliminamos el filestore existente en la máquina virtual
-                    delete_command = f"cd ../../;vagrant ssh -c 'sudo rm -rf {vm_filestore_path}'"
-                    output_box.insert(
-                        tk.END, f"Eliminando filestore existente: {delete_command}\n"
-                    )
-                    process = subprocess.Popen(
-                        delete_command,
-                        shell=True,
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.STDOUT,
-                        text=True,
-                    )
-                    for line in process.stdout:
-                        output_box.insert(tk.END, line)
-                        output_box.see(tk.END)
-
-                    # Mover el nuevo filestore a la máquina virtual
-                    move_filestore = (
-                        f"cd ../../;vagrant ssh -c 'sudo mv "
-                        f"/home/vagrant/dev/temp/filestore {vm_filestore_path}'"
-                    )
-                    output_box.insert(
-                        tk.END, f"Moviendo nuevo filestore: {move_filestore}\n"
-                    )
-                    process = subprocess.Popen(
-                        move_filestore,
-                        shell=True,
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.STDOUT,
-                        text=True,
-                    )
-                    for line in process.stdout:
-                        output_box.insert(tk.END, line)
-                        output_box.see(tk.END)
+                # Eliminar base de datos si existe
+                output_box.insert(tk.END, "🗑️ Eliminando base de datos anterior...\n")
+                drop_database(db_name)
 
+                # Crear nueva base de datos
+                output_box.insert(tk.END, "🆕 Creando nueva base de datos...\n")
+                create_database(db_name)
+
+                profile = None
+                summary = None
+                try:
+                    if fast_mode:
+                        output_box.insert(
+                            tk.END, "⚡ Aplicando perfil de carga masiva en ldb...\n"
+                        )
+                        profile = apply_bulk_load_profile(disable_fsync)
+
+                    restore_start = time.time()
+                    summary = RestoreOutputSummary(db_name, output_box)
+                    if backup_format != "zip":
+                        # Descompresión en streaming directamente hacia psql
+                        output_box.insert(tk.END, "📥 Restaurando datos...\n")
+                        restore_streamed_backup(
+                            backup_file,
+                            backup_format,
+                            codec,
+                            db_name,
+                            output_box,
+                            skip_tables,
+                            summary,
+                        )
+                    elif dump_file == "dump.sql":
+                        # dump.sql directamente desde el ZIP hacia psql, con filtro
+                        output_box.insert(tk.END, "📥 Restaurando datos...\n")
+                        with zipfile.ZipFile(backup_file, "r") as zip_ref:
+                            with zip_ref.open("dump.sql") as source:
+                                restore_sql_stream(
+                                    source, db_name, output_box, skip_tables, summary
+                                )
+                        stream_zip_filestore(backup_file, db_name, output_box)
+                    else:
+                        # Formato custom: se copia al contenedor para usar pg_restore -j
+                        output_box.insert(tk.END, "📥 Restaurando datos...\n")
+
+                        # Primero copiamos el dump al contenedor
+                        copy_to_container = f"cd ../../;vagrant ssh -c 'docker cp /home/vagrant/dev/temp/{db_name}/{dump_file} ldb:/tmp/{db_name}.dump'"
+                        output_box.insert(
+                            tk.END,
+                            f"Copiando dump al contenedor: {copy_to_container}\n",
+                        )
+                        process = subprocess.Popen(
+                            copy_to_container,
+                            shell=True,
+                            stdout=subprocess.PIPE,
+                            stderr=subprocess.STDOUT,
+                            text=True,
+                        )
+                        for line in process.stdout:
+                            output_box.insert(tk.END, line)
+                            output_box.see(tk.END)
+
+                        # Ahora restauramos usando la ruta dentro del contenedor
+                        restore_command = (
+                            f"cd ../../;vagrant ssh -c 'docker exec ldb "
+                            f"pg_restore -U odoo -v --no-owner -j {RESTORE_JOBS} "
+                            f"-d {db_name} /tmp/{db_name}.dump'"
+                        )
+                        output_box.insert(tk.END, f"Ejecutando: {restore_command}\n")
+                        process = subprocess.Popen(
+                            restore_command,
+                            shell=True,
+                            stdout=subprocess.PIPE,
+                            stderr=subprocess.STDOUT,
+                            text=True,
+                            errors="replace",
+                        )
+                        for line in process.stdout:
+                            summary.feed(line)
+
+                        stream_zip_filestore(backup_file, db_name, output_box)
+                finally:
+                    if summary is not None:
+                        summary.close()
+                    if profile is not None:
+                        output_box.insert(
+                            tk.END, "⚡ Restableciendo configuración de ldb...\n"
+                        )
+                        reset_bulk_load_profile(profile)
+
+                if fast_mode:
+                    output_box.insert(tk.END, "📈 Ejecutando ANALYZE...\n")
+                    analyze_database(db_name)
+
+                elapsed = time.time() - restore_start
+                baseline, baseline_source = restore_baseline(backup_file, skip_tables)
+                record_restore_time(backup_file, fast_mode, elapsed, skip_tables)
+                output_box.insert(tk.END, f"⏱️ Restauración en {elapsed:.1f} s")
+                if fast_mode and baseline:
                     output_box.insert(
-                        tk.END, "✅ Filestore actualizado correctamente\n"
+                        tk.END,
+                        f" (base {baseline:.1f} s, {baseline_source}; "
+                        f"ahorro {baseline - elapsed:.1f} s, "
+                        f"{(baseline - elapsed) / baseline:.0%})",
                     )
+                output_box.insert(tk.END, "\n")
 
                 # Esperar un momento
                 output_box.insert(tk.END, "⏳ Finalizando...\n")
@@ -778,8 +4255,17 @@ def restore_database(output_box):
                 output_box.insert(
                     tk.END, f"\n❌ Error al restaurar la base de datos: {str(e)}\n"
                 )
-
-        threading.Thread(target=task).start()
+                raise
+
+        # El perfil de carga masiva es global en ldb: una restauración rápida a la vez
+        locks = [project_lock(db_name)] + (["ldb:config"] if fast_mode else [])
+        submit_job(
+            f"Restaurar {db_name}",
+            locks,
+            task,
+            output_box,
+            heavy=True,
+        )
 
     select_project()
 
@@ -801,7 +4287,7 @@ class FileDialog(filedialog.Open):
 
 
 def show_specific_container_logs(output_box):
-    output_box.delete(1.0, tk.END)
+    output_box.begin_section()
     output_box.insert(tk.END, "🔍 Buscando contenedores...\n\n")
 
     def get_containers():
@@ -828,21 +4314,20 @@ def show_specific_container_logs(output_box):
         )
         listbox.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
-        # Obtener lista de contenedores
-        process = subprocess.Popen(
-            ["vagrant", "ssh", "-c", "docker ps --format '{{.Names}}'"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-        )
-
-        containers = []
-        for line in process.stdout:
+        # Obtener lista de contenedores sin bloquear la interfaz
+        def add_container(line):
             container = line.strip()
-            if container:
-                containers.append(container)
+            if container and listbox.winfo_exists():
                 listbox.insert(tk.END, container)
 
+        run_async(
+            stream_command(
+                ["vagrant", "ssh", "-c", "docker ps --format '{{.Names}}'"],
+                add_container,
+                timeout=120,
+            )
+        )
+
         def on_select():
             if listbox.curselection():
                 selected_container = listbox.get(listbox.curselection())
@@ -860,25 +4345,15 @@ def show_specific_container_logs(output_box):
         select_btn.pack(pady=10)
 
     def show_logs(container_name):
-        output_box.delete(1.0, tk.END)
-        output_box.insert(tk.END, f"📋 Mostrando logs de {container_name}...\n\n")
-
-        def task():
-            process = subprocess.Popen(
-                ["vagrant", "ssh", "-c", f"docker logs -f {container_name} --tail 300"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-            )
-            for line in process.stdout:
-                output_box.insert(tk.END, line)
-                output_box.see(tk.END)
-
-        threading.Thread(target=task).start()
+        start_output_task(follow_container_logs(container_name))
 
     get_containers()
 
 
+# Modo línea de comandos (tareas de VS Code): no crea la ventana
+if __name__ == "__main__" and len(sys.argv) > 1:
+    sys.exit(run_cli(sys.argv[1:]))
+
 # GUI
 root = tk.Tk()
 root.title("LGD Thingker – Terminal Mágica")
@@ -923,7 +4398,7 @@ logs_btn = tk.Button(
     bg="#333",
     fg="#00FF00",
     activebackground="#444",
-    command=lambda: show_container_logs(output_box),
+    command=show_container_logs,
     width=25,
 )
 logs_btn.pack(pady=5)
@@ -977,6 +4452,78 @@ restore_db_btn = tk.Button(
 )
 restore_db_btn.pack(pady=5)
 
+export_db_btn = tk.Button(
+    button_frame,
+    text="📤 Exportar Base de Datos",
+    font=("Consolas", 14),
+    bg="#333",
+    fg="#00FF00",
+    activebackground="#444",
+    command=lambda: export_database(output_box),
+    width=25,
+)
+export_db_btn.pack(pady=5)
+
+checkpoints_btn = tk.Button(
+    button_frame,
+    text="📸 Checkpoints de BD",
+    font=("Consolas", 14),
+    bg="#333",
+    fg="#00FF00",
+    activebackground="#444",
+    command=lambda: manage_checkpoints(output_box),
+    width=25,
+)
+checkpoints_btn.pack(pady=5)
+
+wait_start_btn = tk.Button(
+    button_frame,
+    text="⏱️ Iniciar y esperar Odoo",
+    font=("Consolas", 14),
+    bg="#333",
+    fg="#00FF00",
+    activebackground="#444",
+    command=lambda: start_container_with_wait(output_box),
+    width=25,
+)
+wait_start_btn.pack(pady=5)
+
+vm_mode_btn = tk.Button(
+    button_frame,
+    text="⚙️ Modo de arranque VM",
+    font=("Consolas", 14),
+    bg="#333",
+    fg="#00FF00",
+    activebackground="#444",
+    command=lambda: configure_vm_start_mode(output_box),
+    width=25,
+)
+vm_mode_btn.pack(pady=5)
+
+saved_logs_btn = tk.Button(
+    button_frame,
+    text="🔎 Buscar en logs guardados",
+    font=("Consolas", 14),
+    bg="#333",
+    fg="#00FF00",
+    activebackground="#444",
+    command=lambda: search_saved_logs(output_box),
+    width=25,
+)
+saved_logs_btn.pack(pady=5)
+
+parallel_tests_btn = tk.Button(
+    button_frame,
+    text="🧪 Pruebas en paralelo",
+    font=("Consolas", 14),
+    bg="#333",
+    fg="#00FF00",
+    activebackground="#444",
+    command=lambda: parallel_tests(output_box),
+    width=25,
+)
+parallel_tests_btn.pack(pady=5)
+
 fullscreen_btn = tk.Button(
     button_frame,
     text="🔲 Pantalla Completa",
@@ -1001,25 +4548,79 @@ container_logs_btn = tk.Button(
 )
 container_logs_btn.pack(pady=5)
 
-output_box = scrolledtext.ScrolledText(
-    root,
+# Panel de la cola de trabajos
+tk.Label(
+    button_frame,
+    text="📋 Cola de trabajos",
+    font=("Consolas", 12),
+    bg="#1e1e1e",
+    fg="#00FF00",
+).pack(pady=(15, 0))
+
+queue_listbox = tk.Listbox(
+    button_frame,
+    bg="#333",
+    fg="#00FF00",
+    font=("Consolas", 10),
+    height=8,
+    width=38,
+)
+queue_listbox.pack(pady=5)
+
+JOB_STATE_ICONS = {"waiting": "⏳", "running": "▶️", "done": "✅", "failed": "❌"}
+
+
+def refresh_queue_panel():
+    now = time.time()
+    queue_listbox.delete(0, tk.END)
+    for job in scheduler.snapshot():
+        if job.state == "running":
+            elapsed = f" {now - job.started:.0f}s"
+        elif job.state == "waiting":
+            elapsed = f" {now - job.submitted:.0f}s"
+        else:
+            elapsed = f" {job.finished - job.started:.0f}s"
+        queue_listbox.insert(
+            tk.END, f"{JOB_STATE_ICONS[job.state]} {job.name}{elapsed}"
+        )
+
+
+def refresh_queue_panel_periodically():
+    refresh_queue_panel()
+    root.after(1000, refresh_queue_panel_periodically)
+
+
+scheduler.listeners.append(lambda: root.after(0, refresh_queue_panel))
+refresh_queue_panel_periodically()
+
+output_frame = tk.Frame(root, bg="#000000")
+output_frame.pack(expand=True, fill="both", padx=(5, 10), pady=10)
+
+output_box = OutputBox(
+    output_frame,
     wrap=tk.WORD,
     font=("Consolas", 11),
     bg="#000000",
     fg="#00FF00",
     insertbackground="#00FF00",
 )
-output_box.pack(expand=True, fill="both", padx=(5, 10), pady=10)
+output_box.pack(expand=True, fill="both")
+
+# Los seguimientos de logs usan el visor virtualizado en el mismo sitio
+log_view = LogView(output_frame, output_box)
 
-start_btn.config(command=lambda: run_vagrant_up(output_box))
 
+def on_output_clear():
+    log_view.hide()
+    stop_probe_task()
 
-# Añadir después de la creación de todos los widgets pero antes del mainloop
-def initial_check():
-    update_start_button_state()
 
+output_box.on_clear = on_output_clear
+
+start_btn.config(command=lambda: run_vagrant_up(output_box))
 
-# Añadir al final del archivo, justo antes de root.mainloop()
-initial_check()
 
+start_async_loop()
+root.after(0, lambda: run_async(update_start_button_state()))
 root.mainloop()
+stop_async_loop()